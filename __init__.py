@@ -15,10 +15,10 @@
 ########################################################################################################################
 ########################################################################################################################
 
-import copy
+import binascii
+import bisect
 import enum
-import inspect
-import textwrap
+import sys
 
 ########################################################################################################################
 ########################################################################################################################
@@ -28,6 +28,11 @@ WRITE_COL_WIDTH_BIN   = 35
 WRITE_COL_WIDTH_NAME  = 15
 WRITE_COL_WIDTH_TYPE  = 30
 
+CRC_REFLECT           = bytes(int("{:08b}".format(i)[::-1], 2) for i in range(256)) # bit reflection of each byte value
+
+READING_COLUMNS       = ["server", "obis", "unit", "scaler", "raw", "value"] # values of SML_Telegram.readings
+MALFORMED_ERRORS      = (TypeError, ValueError, IndexError, KeyError, OverflowError) # raised by decoding malformed data
+
 ########################################################################################################################
 ########################################################################################################################
 ########################################################################################################################
@@ -43,9 +48,10 @@ class SMLException(Exception):
     @brief   Constructor.
     @param   Mssg   The Exception message.
     """
-    self._modl = inspect.stack()[1][0].f_locals["self"].__class__.__module__
-    self._clss = inspect.stack()[1][0].f_locals["self"].__class__.__name__
-    self._mthd = inspect.stack()[1][0].f_code.co_name
+    vFrm       = sys._getframe(1) # the raising frame; avoids importing 'inspect' and walking the whole stack
+    self._modl = vFrm.f_locals["self"].__class__.__module__
+    self._clss = vFrm.f_locals["self"].__class__.__name__
+    self._mthd = vFrm.f_code.co_name
     self._mssg = None
     if   ( Mssg == None ): self._mssg = "{}.{}.{}".format(self._modl, self._clss, self._mthd)
     else                 : self._mssg = "{}.{}.{}: {}".format(self._modl, self._clss, self._mthd, Mssg)
@@ -84,6 +90,11 @@ class _SML_Base:
   @brief   SML objects base class.
   """
 
+  _raw = None # immutable data byte list the SML object was decoded from, shared with the SML objects decoded along with it;
+              # None once it was changed by a setter
+  _off = 0    # index of the first byte of the SML object in _raw
+
+
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   def __init__(self, Type=None):
     """
@@ -135,6 +146,39 @@ class _SML_Base:
       vTL = bytearray([0x01])
     return bytearray(vTL)
 
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def skipData(self, Data, Offset=0):
+    """
+    @brief   Determine the end of a SML object within a byte data list by its Type-Length-Fields, without decoding it.
+    @param   Data     SML byte data list.
+    @param   Offset   Index of the first byte of the SML object in the byte data list.
+    @return  The index of the first byte following the SML object.
+    """
+    vSeq = int(_SML_Type.Sequence) # plain int, as comparisons with enum members are comparatively slow
+    vPos = Offset
+    vCnt = 1 # number of SML objects still to skip
+    try:
+      while ( vCnt > 0 ):
+        vCnt -= 1
+        vByt  = Data[vPos]
+        if   ( vByt <= 0x01 ):                                                   # EndOfMessage or optional value not set
+          vPos += 1
+        elif ( vByt < 0x80 ):                                                    # single byte Type-Length-Field
+          if ( (vByt & 0x70) == vSeq ): vPos += 1; vCnt += vByt & 0x0F
+          else                       : vPos += vByt & 0x0F
+        else:
+          vLen = vByt & 0x0F
+          vTlL = 1
+          while ( Data[vPos+vTlL-1] & 0x80 ):
+            vLen  = (vLen << 4) | (Data[vPos+vTlL] & 0x0F)
+            vTlL += 1
+          if ( (vByt & 0x70) == vSeq ): vPos += vTlL; vCnt += vLen # length is the number of elements
+          else                       : vPos += vLen               # length includes the Type-Length-Field
+      if ( vPos > len(Data) ): raise IndexError
+    except IndexError:
+      raise SMLException("Data ends within the SML object starting at index {}.".format(Offset))
+    return vPos
+
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   def crc(self, Data, Int=True):
     """
@@ -144,45 +188,11 @@ class _SML_Base:
     """
     # http://www.photovoltaikforum.com/datenlogger-f5/emh-ehz-protokoll-t86509.html#p836079
     # https://github.com/dailab/libsml/blob/master/sml/src/sml_crc16.c
+    # The CRC16 (X.25) is the bit reflected form of the CRC-CCITT, so binascii.crc_hqx calculates it over the bit
+    # reflected data; reflecting and inverting its result gives the same value as the table driven algorithm of libsml.
     if ( not isinstance(Data, bytearray) ): SMLException("Argument 'Data' is not of type 'bytearray'.")
-    vTab = [
-      0x0000, 0x1189, 0x2312, 0x329b, 0x4624, 0x57ad, 0x6536, 0x74bf,
-      0x8c48, 0x9dc1, 0xaf5a, 0xbed3, 0xca6c, 0xdbe5, 0xe97e, 0xf8f7,
-      0x1081, 0x0108, 0x3393, 0x221a, 0x56a5, 0x472c, 0x75b7, 0x643e,
-      0x9cc9, 0x8d40, 0xbfdb, 0xae52, 0xdaed, 0xcb64, 0xf9ff, 0xe876,
-      0x2102, 0x308b, 0x0210, 0x1399, 0x6726, 0x76af, 0x4434, 0x55bd,
-      0xad4a, 0xbcc3, 0x8e58, 0x9fd1, 0xeb6e, 0xfae7, 0xc87c, 0xd9f5,
-      0x3183, 0x200a, 0x1291, 0x0318, 0x77a7, 0x662e, 0x54b5, 0x453c,
-      0xbdcb, 0xac42, 0x9ed9, 0x8f50, 0xfbef, 0xea66, 0xd8fd, 0xc974,
-      0x4204, 0x538d, 0x6116, 0x709f, 0x0420, 0x15a9, 0x2732, 0x36bb,
-      0xce4c, 0xdfc5, 0xed5e, 0xfcd7, 0x8868, 0x99e1, 0xab7a, 0xbaf3,
-      0x5285, 0x430c, 0x7197, 0x601e, 0x14a1, 0x0528, 0x37b3, 0x263a,
-      0xdecd, 0xcf44, 0xfddf, 0xec56, 0x98e9, 0x8960, 0xbbfb, 0xaa72,
-      0x6306, 0x728f, 0x4014, 0x519d, 0x2522, 0x34ab, 0x0630, 0x17b9,
-      0xef4e, 0xfec7, 0xcc5c, 0xddd5, 0xa96a, 0xb8e3, 0x8a78, 0x9bf1,
-      0x7387, 0x620e, 0x5095, 0x411c, 0x35a3, 0x242a, 0x16b1, 0x0738,
-      0xffcf, 0xee46, 0xdcdd, 0xcd54, 0xb9eb, 0xa862, 0x9af9, 0x8b70,
-      0x8408, 0x9581, 0xa71a, 0xb693, 0xc22c, 0xd3a5, 0xe13e, 0xf0b7,
-      0x0840, 0x19c9, 0x2b52, 0x3adb, 0x4e64, 0x5fed, 0x6d76, 0x7cff,
-      0x9489, 0x8500, 0xb79b, 0xa612, 0xd2ad, 0xc324, 0xf1bf, 0xe036,
-      0x18c1, 0x0948, 0x3bd3, 0x2a5a, 0x5ee5, 0x4f6c, 0x7df7, 0x6c7e,
-      0xa50a, 0xb483, 0x8618, 0x9791, 0xe32e, 0xf2a7, 0xc03c, 0xd1b5,
-      0x2942, 0x38cb, 0x0a50, 0x1bd9, 0x6f66, 0x7eef, 0x4c74, 0x5dfd,
-      0xb58b, 0xa402, 0x9699, 0x8710, 0xf3af, 0xe226, 0xd0bd, 0xc134,
-      0x39c3, 0x284a, 0x1ad1, 0x0b58, 0x7fe7, 0x6e6e, 0x5cf5, 0x4d7c,
-      0xc60c, 0xd785, 0xe51e, 0xf497, 0x8028, 0x91a1, 0xa33a, 0xb2b3,
-      0x4a44, 0x5bcd, 0x6956, 0x78df, 0x0c60, 0x1de9, 0x2f72, 0x3efb,
-      0xd68d, 0xc704, 0xf59f, 0xe416, 0x90a9, 0x8120, 0xb3bb, 0xa232,
-      0x5ac5, 0x4b4c, 0x79d7, 0x685e, 0x1ce1, 0x0d68, 0x3ff3, 0x2e7a,
-      0xe70e, 0xf687, 0xc41c, 0xd595, 0xa12a, 0xb0a3, 0x8238, 0x93b1,
-      0x6b46, 0x7acf, 0x4854, 0x59dd, 0x2d62, 0x3ceb, 0x0e70, 0x1ff9,
-      0xf78f, 0xe606, 0xd49d, 0xc514, 0xb1ab, 0xa022, 0x92b9, 0x8330,
-      0x7bc7, 0x6a4e, 0x58d5, 0x495c, 0x3de3, 0x2c6a, 0x1ef1, 0x0f78
-    ]
-    cCrc = 0xFFFF
-    for b in Data:
-      cCrc = (cCrc >> 8) ^ vTab[(cCrc ^ b) & 0xFF]
-    cCrc ^= 0xFFFF
+    cCrc = binascii.crc_hqx(bytes(Data).translate(CRC_REFLECT), 0xFFFF)
+    cCrc = ((CRC_REFLECT[cCrc&0xFF]<<8) | CRC_REFLECT[(cCrc&0xFF00)>>8]) ^ 0xFFFF
     if   ( True == Int ): return ((cCrc&0xFF)<<8) + ((cCrc&0xFF00)>>8)
     else                : return bytearray([cCrc&0xFF, (cCrc&0xFF00)>>8])
 
@@ -194,8 +204,9 @@ class _SML_Base:
     @param   Info     Extra information to include in human readable representation.
     @return  The human readable representation of a SML object.
     """
+    import textwrap # only needed for human readable output, so kept out of the import of pySML
     vWrp = textwrap.wrap(self.data.hex(), width=32-Indent, initial_indent=" "*(Indent), subsequent_indent=" "*(Indent+2))
-    if   ( isinstance(self._valu, bytearray) ):
+    if   ( isinstance(self._valu, (bytes, bytearray)) ):
       try   : vVal = str(self._valu.decode("utf-8"))
       except: vVal = "???"
     elif ( isinstance(self._valu, int  ) ): vVal = "0x{0:X}; {0:d}".format(self._valu)
@@ -219,6 +230,7 @@ class _SML_Base:
     """
     if ( not isinstance(Type, _SML_Type) ): raise SMLException("Argument 'Type' is not of type '_SML_Type'.")
     self._type = Type
+    self._raw  = None
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   def getValu(self):
@@ -234,7 +246,52 @@ class _SML_Base:
     @brief   Getter method returning the length of the data byte list representation.
     @return  The length of the data byte list representation.
     """
-    return len(self.data)
+    if ( self.isClean() ): return self.skipData(self._raw, self._off) - self._off
+    else                 : return len(self.data)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getRaw(self):
+    """
+    @brief   Getter method returning the data byte list representation the SML object was decoded from. Contained SML
+             objects may have been changed since, see isClean.
+    @return  A copy of the decoded data byte list representation or None if the SML object was changed by a setter.
+    """
+    if ( self._raw == None ): return None
+    return bytearray(self._raw[self._off:self.skipData(self._raw, self._off)])
+
+  def setRaw(self, Raw, Offset=0):
+    """
+    @brief   Setter method letting the SML object and all contained SML objects refer to their bytes within one
+             shared data byte list, instead of to their own copies. Does nothing unless they are all unchanged since
+             they were decoded (see isClean), as only then their positions follow from their encoding.
+    @param   Raw      Immutable data byte list (bytes) containing the data byte list representation of the SML object.
+    @param   Offset   The index of the first byte of the SML object in 'Raw'.
+    """
+    if ( not self.isClean() ): return
+    for o,p in self.getOffsets(Offset)[0].items():
+      if ( o.__dict__.get("_raw") != None ): o._raw = Raw; o._off = p # a class attribute (SML_EndOfMessage) stays
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def isClean(self):
+    """
+    @brief   Check whether the SML object is unchanged since it was decoded, so getData may return the data byte list
+             it was decoded from. Changes have to be made by the setter methods to be noticed.
+    @return  True if the SML object and all contained SML objects are unchanged.
+    """
+    return self._raw != None
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getOffsets(self, Offset=0, Offsets=None):
+    """
+    @brief   Getter method returning the position of this and all contained SML objects within a data byte list.
+    @param   Offset    The index of the first byte of this SML object.
+    @param   Offsets   Dictionary to add the positions to; None means a new one.
+    @return  A list of the dictionary mapping each SML object to the index of its first byte and the index of the
+             first byte after this SML object.
+    """
+    if ( Offsets == None ): Offsets = {}
+    Offsets[self] = Offset
+    return [Offsets, Offset + self.datalen]
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   type    = property(getType, setType)
@@ -250,6 +307,8 @@ class SML_EndOfMessage(_SML_Base):
   @brief   SML_EndOfMessage class.
   """
 
+  _raw = bytes([0x00]) # can not be changed, so it is always clean
+
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   def __init__(self):
     """
@@ -290,7 +349,7 @@ class SML_OctetString(_SML_Base):
     @param   Value   The initial value.
     """
     _SML_Base.__init__(self, _SML_Type.OctetString )
-    if ( not (isinstance(Value, type(None)) or isinstance(Value, bytearray)) ): raise SMLException("Argument 'Value' is not of type 'None' or 'bytearray'.")
+    if ( not (isinstance(Value, type(None)) or isinstance(Value, (bytes, bytearray))) ): raise SMLException("Argument 'Value' is not of type 'None', 'bytes' or 'bytearray'.")
     self._valu = Value
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -299,8 +358,9 @@ class SML_OctetString(_SML_Base):
     @brief   Setter method assigning a value directly.
     @param   Value   The value to set.
     """
-    if ( not (isinstance(Value, type(None)) or isinstance(Value, bytearray)) ): raise SMLException("Argument 'Value' is not of type 'None' or 'bytearray'.")
+    if ( not (isinstance(Value, type(None)) or isinstance(Value, (bytes, bytearray))) ): raise SMLException("Argument 'Value' is not of type 'None', 'bytes' or 'bytearray'.")
     self._valu = Value
+    self._raw  = None
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   def getData(self):
@@ -308,21 +368,27 @@ class SML_OctetString(_SML_Base):
     @brief   Getter method returning the data byte list representation.
     @return  The data byte list representation.
     """
-    if ( self._valu == None ): return bytearray([0x01])
-    else                     : return self.encodeTl(self.type, len(self._valu)) + self._valu
+    if   ( self._raw  != None ): return self.getRaw()
+    elif ( self._valu == None ): return bytearray([0x01])
+    else                       : return self.encodeTl(self.type, len(self._valu)) + self._valu
 
   def setData(self, Data):
     """
     @brief   Setter method assigning a value from a data byte list representation.
     @param   Data   SML byte data list representation.
     """
+    self._raw = None
     vTyp,vLen,vEofTL = self.decodeTl(Data)
     if ( vTyp == None ):
       self._valu = None
+      self._raw  = bytes(Data[:1])
+      self._off  = 0
     else:
       if   ( vTyp == _SML_Type.OctetString ): self._valu = bytearray(Data[(vEofTL+1):vLen])
       else                                  : raise SMLException("Received 'Data' seems to be no 'OctetString'.")
       if   ( self.data != Data[:vLen]      ): raise SMLException("Received 'Data' did not match internal representation.")
+      self._raw = bytes(Data[:vLen])
+      self._off = 0
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   valu = property(_SML_Base.getValu, setValu)
@@ -353,6 +419,7 @@ class SML_Boolean(_SML_Base):
     """
     if ( not (isinstance(Value, type(None)) or isinstance(Value, bool)) ): raise SMLException("Argument 'Value' is not of type 'None' or 'bool'.")
     self._valu = Value
+    self._raw  = None
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   def getData(self):
@@ -360,21 +427,27 @@ class SML_Boolean(_SML_Base):
     @brief   Getter method returning the data byte list representation.
     @return  The data byte list representation.
     """
-    if ( self._valu == None ): return bytearray([0x01])
-    else                     : return self.encodeTl(self._type, 1) + self._valu.to_bytes(1, 'big', signed=False)
+    if   ( self._raw  != None ): return self.getRaw()
+    elif ( self._valu == None ): return bytearray([0x01])
+    else                       : return self.encodeTl(self._type, 1) + self._valu.to_bytes(1, 'big', signed=False)
 
   def setData(self, Data):
     """
     @brief   Setter method assigning a value from a data byte list representation.
     @param   Data   SML byte data list representation
     """
+    self._raw = None
     vTyp,vLen,vEofTL = self.decodeTl(Data)
     if ( vTyp == None ):
       self._valu = None
+      self._raw  = bytes(Data[:1])
+      self._off  = 0
     else:
       if   ( vTyp == _SML_Type.Boolean  ): self._valu = int.from_bytes(Data[(vEofTL+1):vLen], 'big', signed=False )
       else                               : raise SMLException("Received 'Data' seems to be no 'Boolean'.")
       if   ( self.data != Data[:vLen]   ): raise SMLException("Received 'Data' did not match internal representation.")
+      self._raw = bytes(Data[:vLen])
+      self._off = 0
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   valu = property(_SML_Base.getValu, setValu)
@@ -441,6 +514,7 @@ class SML_Integer(_SML_Base):
     if ( Value != None and Value < self.minInteger                     ): raise SMLException("Argument 'Value' did not match the possible minimum value specified by 'NBytes'.")
     if ( Value != None and Value > self.maxInteger                     ): raise SMLException("Argument 'Value' did not match the possible maximum value specified by 'NBytes'.")
     self._valu = Value
+    self._raw  = None
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   def getData(self):
@@ -448,17 +522,21 @@ class SML_Integer(_SML_Base):
     @brief   Getter method returning the data byte list representation.
     @return  The data byte list representation.
     """
-    if ( self._valu == None ): return bytearray([0x01])
-    else                     : return self.encodeTl(self.type, self._nbytes) + self._valu.to_bytes(self._nbytes, 'big', signed=self.isSigned)
+    if   ( self._raw  != None ): return self.getRaw()
+    elif ( self._valu == None ): return bytearray([0x01])
+    else                       : return self.encodeTl(self.type, self._nbytes) + self._valu.to_bytes(self._nbytes, 'big', signed=self.isSigned)
 
   def setData(self, Data):
     """
     @brief   Setter method assigning a value from a data byte list representation.
     @param   Data   SML byte data list representation
     """
+    self._raw = None
     vTyp,vLen,vEofTL = self.decodeTl(Data)
     if ( vTyp == None ):
       self._valu = None
+      self._raw  = bytes(Data[:1])
+      self._off  = 0
     else:
       if   ( (self._nbytes != None) and (self._nbytes != (vLen-1)) ): raise SMLException("Received 'Data' length information did not match specified length.") # check if specified _nbytes matches length info in byte data list representation
       else                                                          : self._nbytes = vLen-1 # set _nbytes from byte data list representation
@@ -466,6 +544,8 @@ class SML_Integer(_SML_Base):
       elif ( vTyp == _SML_Type.UnsignedInteger ): self._valu = int.from_bytes(Data[(vEofTL+1):vLen], 'big', signed=False)
       else                                      : raise SMLException("Unknown state for 'signed' information.")
       if ( self.data != Data[:vLen]            ): raise SMLException("Received 'Data' did not match internal representation.")
+      self._raw = bytes(Data[:vLen])
+      self._off = 0
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   isSigned   = property(GetIsSigned               )
@@ -576,7 +656,9 @@ class SML_Choice(_SML_Base):
     @brief   Getter method returning the data byte list representation.
     @return  The data byte list representation.
     """
-    if ( self._valu == None ):
+    if ( self.isClean() ):
+      return self.getRaw()
+    elif ( self._valu == None ):
       return bytearray([0x01])
     else:
       if ( self._typ == "implicit" ):
@@ -590,9 +672,12 @@ class SML_Choice(_SML_Base):
     @param   Data   SML byte data list representation
     """
     if ( not isinstance(Data, bytearray) ): raise SMLException("Argument 'Data' is not of type 'bytearray'.")
+    self._raw = None
+    vAll = Data
     vTyp,vLen,vEofTL = self.decodeTl(Data)
     if ( vTyp == None ):
       self._valu = None
+      Data = Data[1:]
     else:
       if ( self._typ == "implicit" ):
         if   ( vTyp == _SML_Type.OctetString     ): self._valu = SML_OctetString()
@@ -604,21 +689,71 @@ class SML_Choice(_SML_Base):
           elif ( vLen == 9 ): self._valu = SML_SignedInteger64()
           else              : self._valu = SML_SignedInteger()
         elif ( vTyp == _SML_Type.UnsignedInteger ):
-          if   ( vLen == 2 ): self._valu = SML_UnignedInteger08()
+          if   ( vLen == 2 ): self._valu = SML_UnsignedInteger08()
           elif ( vLen == 3 ): self._valu = SML_UnsignedInteger16()
           elif ( vLen == 5 ): self._valu = SML_UnsignedInteger32()
           elif ( vLen == 9 ): self._valu = SML_UnsignedInteger64()
           else              : self._valu = SML_UnsignedInteger()
         elif ( vTyp == _SML_Type.Sequence        ): self._valu = SML_Sequence()
         self._valu.data = Data
+        Data = Data[self._valu.datalen:]
       else:
         Data = Data[(vEofTL+1):]
         self._tag.data  = Data
         Data = Data[self._tag.datalen:]
-        self._valu      = self._map[self._tag.valu]
+        import copy
+        self._valu      = copy.deepcopy(self._map[self._tag.valu]) # never decode into the shared prototype
         self._valu.data = Data
         Data = Data[self._valu.datalen:]
     setattr(self._par, "Element", self._valu)
+    if ( (self._typ == "implicit") or (self._valu == None) or (vAll[:(vEofTL+1)] == self.encodeTl(self.type, 2)) ): # keep only what the encoder would produce
+      self._raw = bytes(vAll[:(len(vAll)-len(Data))])
+      self._off = 0
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def isClean(self):
+    """
+    @brief   Check whether the SML_Choice and its chosen SML object are unchanged since they were decoded.
+    @return  True if unchanged.
+    """
+    if ( (self._raw == None) or (self._valu == None) ): return self._raw != None
+    return self._valu.isClean() and ((self._tag == None) or self._tag.isClean())
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getOffsets(self, Offset=0, Offsets=None):
+    """
+    @brief   Getter method returning the position of this and all contained SML objects within a data byte list.
+    @param   Offset    The index of the first byte of this SML_Choice.
+    @param   Offsets   Dictionary to add the positions to; None means a new one.
+    @return  A list of the dictionary mapping each SML object to the index of its first byte and the index of the
+             first byte after this SML_Choice.
+    """
+    if ( Offsets == None ): Offsets = {}
+    Offsets[self] = Offset
+    if   ( self._valu == None      ): return [Offsets, Offset + 1]
+    elif ( self._typ == "implicit" ): return self._valu.getOffsets(Offset, Offsets)
+    vOff = Offset + len(self.encodeTl(self.type, 2))
+    vOff = self._tag.getOffsets(vOff, Offsets)[1]
+    return self._valu.getOffsets(vOff, Offsets)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def setElement(self, Element, Tag=None):
+    """
+    @brief   Setter method assigning the chosen SML object directly.
+    @param   Element   The chosen SML object; None means the SML_Choice is not set.
+    @param   Tag       The tag value selecting 'Element' of an explicit SML_Choice; 'Element' has to be of the type the
+                       tag value maps to. Not used by implicit SML_Choices.
+    """
+    if ( Element != None ):
+      if ( self._typ == "implicit" ):
+        if ( not isinstance(Element, (SML_OctetString, SML_Boolean, SML_Integer)) ): raise SMLException("Argument 'Element' is not of type 'SML_OctetString', 'SML_Boolean' or 'SML_Integer'.")
+      else:
+        if ( Tag not in self._map                    ): raise SMLException("Argument 'Tag' is not a key of the map of the SML_Choice.")
+        if ( type(Element) != type(self._map[Tag])   ): raise SMLException("Argument 'Element' is not of type '{}' as mapped by argument 'Tag'.".format(type(self._map[Tag]).__name__))
+        self._tag.valu = Tag
+    self._valu = Element
+    self._raw  = None
+    setattr(self._par, "Element", self._valu)
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   def getValu(self):
@@ -649,24 +784,26 @@ class SML_Value(SML_Choice):
     SML_Choice.__init__(self, self)
 
 class SML_MessageBody(SML_Choice):
+  _bodies = None # prototypes of all message bodies; built on first use and shared, as decoding only copies them
   def __init__(self):
-    SML_Choice.__init__(self, self, SML_UnsignedInteger16(), {0x00000100: SML_PublicOpenReq(),
-                                                              0x00000101: SML_PublicOpenRes(),
-                                                              0x00000200: SML_PublicCloseReq(),
-                                                              0x00000201: SML_PublicCloseRes(),
-                                                            #0x00000300: SML_GetProfilePackReq
-                                                            #0x00000301: SML_GetProfilePackRes
-                                                            #0x00000400: SML_GetProfileListReq
-                                                            #0x00000401: SML_GetProfileListRes
-                                                            #0x00000500: SML_GetProcParameterReq
-                                                            #0x00000501: SML_GetProcParameterRes
-                                                            #0x00000600: SML_SetProcParameterReq
-                                                            #0x00000601: SML_SetProcParameterRes
-                                                              0x00000700: SML_GetListReq(),
-                                                              0x00000701: SML_GetListRes()
-                                                            #0x0000FF01: SML_AttentionRes
-                                                           }
-                       )
+    if ( SML_MessageBody._bodies == None ):
+      SML_MessageBody._bodies = {0x00000100: SML_PublicOpenReq(),
+                                 0x00000101: SML_PublicOpenRes(),
+                                 0x00000200: SML_PublicCloseReq(),
+                                 0x00000201: SML_PublicCloseRes(),
+                                #0x00000300: SML_GetProfilePackReq
+                                #0x00000301: SML_GetProfilePackRes
+                                #0x00000400: SML_GetProfileListReq
+                                #0x00000401: SML_GetProfileListRes
+                                #0x00000500: SML_GetProcParameterReq
+                                #0x00000501: SML_GetProcParameterRes
+                                #0x00000600: SML_SetProcParameterReq
+                                #0x00000601: SML_SetProcParameterRes
+                                 0x00000700: SML_GetListReq(),
+                                 0x00000701: SML_GetListRes()
+                                #0x0000FF01: SML_AttentionRes
+                                }
+    SML_Choice.__init__(self, self, SML_UnsignedInteger16(), SML_MessageBody._bodies)
 
 ########################################################################################################################
 ########################################################################################################################
@@ -734,6 +871,7 @@ class SML_Sequence(_SML_Base):
     for e in Value:
       if ( not isinstance(e, type(self._objc)) ): raise SMLException("Element '{}' of argument 'Value' is not of type '{}' as configured by the contructor.".format(e, type(self._objc)))
     self._valu = Value
+    self._raw  = None
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   def getData(self):
@@ -741,7 +879,8 @@ class SML_Sequence(_SML_Base):
     @brief   Getter method returning the data byte list representation.
     @return  The data byte list representation.
     """
-    return self.encodeTl(self.type, len(self._valu)) + bytearray([b for e in self._valu for b in e.data])
+    if ( self.isClean() ): return self.getRaw()
+    return self.encodeTl(self.type, len(self._valu)) + bytearray().join(e.data for e in self._valu)
 
   def setData(self, Data):
     """
@@ -749,6 +888,8 @@ class SML_Sequence(_SML_Base):
     @param   Data   SML byte data list representation
     """
     if ( not isinstance(Data, bytearray) ): raise SMLException("Argument 'Data' is not of type 'bytearray'.")
+    self._raw = None
+    vAll = Data
     vTyp,vLen,vEofTL = self.decodeTl(Data)
     Data = Data[(vEofTL+1):]
     if ( vTyp == None ):
@@ -760,10 +901,42 @@ class SML_Sequence(_SML_Base):
             e.data = Data
             Data = Data[e.datalen:]
       else:
+        import copy
+        self._valu = []
         for e in range(vLen):
-          self._objc.data = Data
-          Data = Data[self._objc.datalen:]
-          self._valu.append( copy.deepcopy(self._objc) )
+          vElem      = copy.deepcopy(self._objc) # never decode into the shared prototype
+          vElem.data = Data
+          Data = Data[vElem.datalen:]
+          self._valu.append(vElem)
+    if ( (self._valu == None) or (vAll[:(vEofTL+1)] == self.encodeTl(self.type, len(self._valu))) ): # keep only what the encoder would produce
+      self._raw = bytes(vAll[:(len(vAll)-len(Data))])
+      self._off = 0
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def isClean(self):
+    """
+    @brief   Check whether the SML_Sequence and all its elements are unchanged since they were decoded.
+    @return  True if unchanged.
+    """
+    if ( (self._raw == None) or (self._valu == None) ): return self._raw != None
+    return all(e.isClean() for e in self._valu)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getOffsets(self, Offset=0, Offsets=None):
+    """
+    @brief   Getter method returning the position of this and all contained SML objects within a data byte list.
+    @param   Offset    The index of the first byte of this SML_Sequence.
+    @param   Offsets   Dictionary to add the positions to; None means a new one.
+    @return  A list of the dictionary mapping each SML object to the index of its first byte and the index of the
+             first byte after this SML_Sequence.
+    """
+    if ( Offsets == None ): Offsets = {}
+    Offsets[self] = Offset
+    if ( self._valu == None ): return [Offsets, Offset + 1]
+    vOff = Offset + len(self.encodeTl(self.type, len(self._valu)))
+    for e in self._valu:
+      vOff = e.getOffsets(vOff, Offsets)[1]
+    return [Offsets, vOff]
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   data = property(getData, setData)
@@ -783,6 +956,8 @@ class SML_ObjReqEntry(SML_Sequence):
                          )
 
 class SML_ValueEntry(SML_Sequence):
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   def __init__(self):
     SML_Sequence.__init__(self, self, [ ("ObjName",        SML_OctetString()      ),
                                         ("Status",         SML_Status()           ),
@@ -794,6 +969,34 @@ class SML_ValueEntry(SML_Sequence):
                                       ]
                          )
 
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getObis(self):
+    """
+    @brief   Getter method returning the OBIS code of 'ObjName' in its textual representation 'A-B:C.D.E*F'.
+    @return  The textual OBIS code, the hex representation if 'ObjName' is no 6 byte value or None if it is not set.
+    """
+    vObj = self.ObjName.valu
+    if   ( vObj == None   ): return None
+    elif ( len(vObj) != 6 ): return vObj.hex()
+    else                   : return "{}-{}:{}.{}.{}*{}".format(*vObj)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getScaled(self):
+    """
+    @brief   Getter method returning 'Value' with 'Scaler' applied.
+    @return  The scaled value for integer values, otherwise the plain value of 'Value'.
+    """
+    vVal = self.Value.Element.valu if ( self.Value.Element != None ) else None
+    vScl = self.Scaler.valu
+    if ( isinstance(vVal, int) and not isinstance(vVal, bool) and (vScl != None) ):
+      if ( vScl >= 0 ): return vVal * 10**vScl
+      else            : return vVal / 10**(-vScl)
+    return vVal
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  obis   = property(getObis  )
+  scaled = property(getScaled)
+
 class SML_ListOfValueEntry(SML_Sequence):
   def __init__(self):
     SML_Sequence.__init__(self, self, SML_ValueEntry()
@@ -885,6 +1088,7 @@ class SML_Message(SML_Sequence):
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   def setData(self, Data):
     SML_Sequence.setData(self, Data)
+    self.setRaw(self._raw, self._off) # the contained SML objects drop their own copies
     crc_cmp = self.crc(Data[:(self.datalen-4)])
     crc_dat = self.Crc.valu
     if ( crc_dat != crc_cmp ): raise SMLExceptionChecksum("actual - 0x{:04X}; nominal - 0x{:04X}".format(crc_dat, crc_cmp))
@@ -902,11 +1106,33 @@ class SML_Telegram(_SML_Base):
   """
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-  def __init__(self):
+  def __init__(self, MessageTypes=None, CheckSkipped=False, Compiled=False, Intern=None):
     """
     @brief  Constructor.
-    """
+    @param  MessageTypes   Collection of SML_MessageBody tags (e.g. {0x0701}) of the SML_Messages to decode; the bodies
+                           of all others are skipped by their Type-Length-Fields and are not part of the telegram.
+                           None means all SML_Messages are decoded.
+    @param  CheckSkipped   Bool value to specify whether the CRC of skipped SML_Messages shall be checked anyway.
+    @param  Compiled       Bool value to specify whether the SML_Messages shall be decoded by the specialised decode
+                           functions generated by pySML.compiler instead of the generic 'setData' methods.
+    @param  Intern         SML_InternTable the 'ServerId', 'ListName' and 'ObjName' values of the decoded SML_Messages
+                           are interned in; None means they are not interned.
+    """
+    if ( not (isinstance(MessageTypes, type(None)) or all(isinstance(t, int) for t in MessageTypes)) ): raise SMLException("Argument 'MessageTypes' is not of type 'None' or a collection of 'int'.")
+    if ( not isinstance(CheckSkipped, bool)                                                         ): raise SMLException("Argument 'CheckSkipped' is not of type 'bool'.")
+    if ( not isinstance(Compiled, bool)                                                             ): raise SMLException("Argument 'Compiled' is not of type 'bool'.")
+    if ( not isinstance(Intern, (type(None), SML_InternTable))                                      ): raise SMLException("Argument 'Intern' is not of type 'None' or 'SML_InternTable'.")
     self.__mssg = []
+    self.__offs = [] # index of each SML_Message in __data
+    self.__data = None # the byte data list the SML_Telegram was decoded from
+    self.__nofs = None # index of each SML object in __data; built by the first call of edit
+    self.__mtyp = None if ( MessageTypes == None ) else frozenset(MessageTypes)
+    self.__mchk = CheckSkipped
+    self.__intn = Intern
+    self.__comp = None
+    if ( Compiled ):
+      from .compiler import SML_Compiler
+      self.__comp = SML_Compiler.getDefault().getFunc(SML_Message)
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   def getText(self):
@@ -935,6 +1161,8 @@ class SML_Telegram(_SML_Base):
   def setData(self, Data):
     """
     @brief   Setter method assigning a value from a data byte list representation.
+             If the SML_Telegram was constructed with 'MessageTypes', the data byte list representation returned by
+             getData afterwards only contains the decoded SML_Messages.
     @param   Data   SML byte data list representation.
     """
     if ( Data[:8]    != bytearray([0x1B, 0x1B, 0x1B, 0x1B, 0x01, 0x01, 0x01, 0x01]) ): raise SMLException("Could not find escape sequence 'start of telegram'.")
@@ -943,11 +1171,96 @@ class SML_Telegram(_SML_Base):
     crc_cmp = self.crc(bytearray(Data[:-2]), Int=False)
     crc_dat = Data[-2:]
     if ( crc_dat != crc_cmp                                                         ): raise SMLExceptionChecksum("actual - 0x{}; nominal - 0x{}".format(''.join('{:02X}'.format(x) for x in crc_dat), ''.join('{:02X}'.format(x) for x in crc_cmp)))
-    Data = Data[8:(-8-Data[-3])]
-    while ( len(Data) > 0 ):
-      self.__mssg.append(SML_Message())
-      self.__mssg[-1].data = Data
-      Data = Data[self.__mssg[-1].datalen:]
+    self.__data = Data
+    self.__nofs = None
+    self.__offs = []
+    self.__mssg = []
+    vRaw = bytes(Data[8:(-8-Data[-3])]) # the only copy of the SML_Messages, all decoded SML objects refer to it
+    vPos = 0
+    while ( vPos < len(vRaw) ):
+      if ( self.__mtyp != None ):
+        vTag,vCrc = self.getMssgTag(vRaw, vPos)
+        if ( vTag not in self.__mtyp ):
+          vEoC = self.skipData(vRaw, vCrc)
+          vEnd = self.skipData(vRaw, vEoC)
+          if ( self.__mchk ):
+            crc_cmp = self.crc(vRaw[vPos:vCrc])
+            crc_dat = int.from_bytes(vRaw[(vCrc+1):vEoC], 'big', signed=False)
+            if ( crc_dat != crc_cmp ): raise SMLExceptionChecksum("actual - 0x{:04X}; nominal - 0x{:04X}".format(crc_dat, crc_cmp))
+          vPos = vEnd
+          continue
+      if ( self.__comp == None ):
+        vMsg      = SML_Message()
+        vMsg.data = bytearray(vRaw[vPos:])
+        vMsg.setRaw(vRaw, vPos)
+        vEnd      = vPos + vMsg.datalen
+      else:
+        vMsg,vEnd = self.__comp(vRaw, vPos)
+      if ( self.__intn != None ): self.__intn.internMssg(vMsg)
+      self.__mssg.append(vMsg)
+      self.__offs.append(8 + vPos)
+      vPos = vEnd
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def edit(self, Node, Value):
+    """
+    @brief   Assign a value to a SML object of a decoded SML_Telegram and patch the byte data list the SML_Telegram was
+             decoded from in place.
+             If the length of the data byte list representation of 'Node' does not change, only its bytes, the 'Crc'
+             of the enclosing SML_Message and the CRC of the SML_Telegram are rewritten. Otherwise the enclosing
+             SML_Message is re-encoded and the end of the SML_Telegram is rebuilt.
+    @param   Node    SML_OctetString, SML_Boolean or SML_Integer within one of the SML_Messages.
+    @param   Value   The value to assign to 'Node'.
+    @return  The patched byte data list.
+    """
+    if ( self.__data == None                                               ): raise SMLException("SML_Telegram was not decoded from a byte data list.")
+    if ( not isinstance(Node, (SML_OctetString, SML_Boolean, SML_Integer)) ): raise SMLException("Argument 'Node' is not of type 'SML_OctetString', 'SML_Boolean' or 'SML_Integer'.")
+    if ( self.__nofs == None ):
+      self.__nofs = {}
+      for msg,off in zip(self.__mssg, self.__offs): msg.getOffsets(off, self.__nofs)
+    if ( Node not in self.__nofs ): raise SMLException("Argument 'Node' is not part of the SML_Telegram.")
+    Data = self.__data
+    vPos = self.__nofs[Node]
+    i    = bisect.bisect_right(self.__offs, vPos) - 1
+    msg  = self.__mssg[i]
+    vMsg = self.__offs[i]
+    vOld = Node.datalen
+    Node.valu = Value
+    vNew = Node.data
+    if ( len(vNew) == vOld ):
+      Data[vPos:(vPos+vOld)] = vNew
+      vCrc = self.__nofs[msg.Crc]
+      msg.Crc.valu = self.crc(Data[vMsg:vCrc])
+      Data[vCrc:(vCrc+msg.Crc.datalen)] = msg.Crc.data
+    else:
+      vLen = msg.datalen - len(vNew) + vOld
+      msg.Crc.valu = self.crc(msg.data[:msg.getOffsets()[0][msg.Crc]])
+      Data[vMsg:(vMsg+vLen)] = msg.data
+      for j in range(i+1, len(self.__offs)): self.__offs[j] += msg.datalen - vLen
+      vEoM = len(Data) - 8 - Data[-3]
+      lna  = vEoM%4 # padding as in getData
+      Data[vEoM:] = bytearray([0x00]*(lna)) + bytearray([0x1B, 0x1B, 0x1B, 0x1B, 0x1A, lna, 0x00, 0x00])
+      self.__nofs = None
+    Data[-2:] = self.crc(Data[:-2], Int=False)
+    return Data
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getMssgTag(self, Data, Offset=0):
+    """
+    @brief   Determine the SML_MessageBody tag of a SML_Message without decoding the SML_Message.
+    @param   Data     SML byte data list containing a SML_Message.
+    @param   Offset   Index of the first byte of the SML_Message in the byte data list.
+    @return  A list of the SML_MessageBody tag and the index of the 'Crc' element of the SML_Message.
+    """
+    if ( Data[Offset] != 0x76 ): raise SMLException("Received 'Data' seems to be no 'SML_Message'.")
+    vPos = Offset + 1
+    for e in range(3): vPos = self.skipData(Data, vPos) # TransactionId, GroupNo, AbortOnError
+    if ( Data[vPos] != 0x72 ): raise SMLException("Received 'Data' seems to contain no 'SML_MessageBody'.")
+    vTag = vPos + 1
+    vBdy = self.skipData(Data, vTag)
+    vTyp,vLen,vEofTL = self.decodeTl(bytearray(Data[vTag:vBdy]))
+    if ( vTyp != _SML_Type.UnsignedInteger ): raise SMLException("Received 'Data' seems to contain no 'SML_MessageBody' tag.")
+    return [int.from_bytes(Data[(vTag+vEofTL+1):vBdy], 'big', signed=False), self.skipData(Data, vBdy)]
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
   def getMssg(self):
@@ -958,8 +1271,300 @@ class SML_Telegram(_SML_Base):
     return self.__mssg
 
   #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-  data = property(getData, setData)
-  msg  = property(getMssg)
+  def getEntries(self):
+    """
+    @brief   Getter method returning the SML_ValueEntrys of all SML_GetListRes messages in SML_Telegram.
+    @return  A list of tuples of the 'ServerId' value of the SML_GetListRes and the SML_ValueEntry.
+    """
+    vRes = []
+    for msg in self.__mssg:
+      vBdy = msg.MessageBody.Element
+      if ( isinstance(vBdy, SML_GetListRes) ):
+        for e in vBdy.ValList.valu:
+          vRes.append((vBdy.ServerId.valu, e))
+    return vRes
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getReadings(self):
+    """
+    @brief   Getter method returning the SML_ValueEntrys of all SML_GetListRes messages in SML_Telegram as plain values,
+             e.g. to be written as CSV or JSON.
+    @return  A list of tuples of the values named by READING_COLUMNS; byte values as hex string.
+    """
+    vRes = []
+    for vSid,vEnt in self.getEntries():
+      vRaw = vEnt.Value.Element.valu if ( vEnt.Value.Element != None ) else None
+      vRes.append(tuple(v.hex() if isinstance(v, (bytes, bytearray)) else v for v in (vSid, vEnt.obis, vEnt.Unit.valu, vEnt.Scaler.valu, vRaw, vEnt.scaled)))
+    return vRes
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getReceived(self):
+    """
+    @brief   Getter method returning the byte data list the SML_Telegram was decoded from. Unlike getData it contains the
+             SML_Messages skipped by 'MessageTypes' and the exact bytes received, apart from the changes made by edit.
+    @return  The byte data list, or None if the SML_Telegram was not decoded.
+    """
+    return self.__data
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  data     = property(getData, setData)
+  msg      = property(getMssg)
+  entries  = property(getEntries)
+  readings = property(getReadings)
+  received = property(getReceived)
+
+########################################################################################################################
+
+class SML_Framer:
+  """
+  @brief   SML_Framer class.
+           Incrementally splits a byte stream into SML telegrams delimited by the escape sequences of the transport
+           protocol v1. Bytes outside of telegrams are discarded.
+  """
+
+  START = bytes([0x1B, 0x1B, 0x1B, 0x1B, 0x01, 0x01, 0x01, 0x01])
+  ESC   = bytes([0x1B, 0x1B, 0x1B, 0x1B])
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __init__(self, MaxSize=65536):
+    """
+    @brief   Constructor.
+    @param   MaxSize   Maximum size of a telegram; longer candidates are discarded.
+    """
+    if ( not isinstance(MaxSize, int) ): raise SMLException("Argument 'MaxSize' is not of type 'int'.")
+    self._max  = MaxSize
+    self._buf  = bytearray()
+    self._scan = 8 # offset in _buf from which to continue searching for an escape sequence
+    self._drop = 0
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def feed(self, Data):
+    """
+    @brief   Append received bytes and extract all telegrams completed by them.
+    @param   Data   Received bytes (bytes, bytearray or memoryview).
+    @return  A list of complete telegrams, each as bytearray including both escape sequences and the CRC.
+    """
+    vBuf = self._buf
+    vBuf += Data
+    vRes = []
+    while True:
+      # synchronise on 'start of telegram'
+      if ( vBuf[:8] != SML_Framer.START ):
+        vIdx = vBuf.find(SML_Framer.START)
+        if ( vIdx < 0 ): vIdx = max(0, len(vBuf)-7)
+        self._drop += vIdx
+        del vBuf[:vIdx]
+        self._scan  = 8
+        if ( len(vBuf) < 8 ): break
+      # search the escape sequence terminating the telegram; it is not required to be 4 byte aligned, as the
+      # padding of some meters is not correct
+      vEnd = None
+      vIdx = vBuf.find(SML_Framer.ESC, self._scan)
+      while ( vIdx >= 0 ):
+        vSeq = vBuf[vIdx+4:vIdx+8]
+        if   ( len(vSeq) < 4                ): break
+        elif ( vSeq == SML_Framer.ESC       ): vIdx = vBuf.find(SML_Framer.ESC, vIdx+8); continue # escaped payload
+        elif ( vSeq[0] == 0x1A              ): vEnd =  (vIdx+8)
+        elif ( vSeq == SML_Framer.START[4:] ): vEnd = -(vIdx  ) # a new telegram starts before this one ended
+        else                                 : vEnd = -(vIdx+8) # unknown escape sequence
+        break
+      if   ( vEnd == None ):
+        if ( len(vBuf) > self._max ):
+          self._drop += len(vBuf)
+          del vBuf[:]
+        elif ( vIdx >= 0 ):
+          self._scan = vIdx
+        else:
+          self._scan = max(8, len(vBuf)-3)
+        break
+      elif ( vEnd < 0 ):
+        self._drop += -vEnd
+        del vBuf[:-vEnd]
+      elif ( vEnd > self._max ):
+        self._drop += vEnd
+        del vBuf[:vEnd]
+      else:
+        vRes.append(vBuf[:vEnd])
+        del vBuf[:vEnd]
+      self._scan = 8
+    return vRes
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getDropped(self):
+    """
+    @brief   Getter method returning the number of bytes discarded so far.
+    @return  The number of bytes discarded so far.
+    """
+    return self._drop
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getPending(self):
+    """
+    @brief   Getter method returning the number of buffered bytes not yet part of a complete telegram.
+    @return  The number of buffered bytes.
+    """
+    return len(self._buf)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  dropped = property(getDropped)
+  pending = property(getPending)
+
+########################################################################################################################
+
+class SML_InternTable:
+  """
+  @brief   SML_InternTable class.
+           Maps identifiers like OBIS codes and server IDs to a single immutable bytes object each, so the identifiers
+           of many decoded telegrams share their memory and are cheap dict keys. The table is bounded; once it is full,
+           new identifiers are returned as bytes without being added.
+  """
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __init__(self, MaxSize=4096):
+    """
+    @brief   Constructor.
+    @param   MaxSize   Maximum number of interned identifiers.
+    """
+    if ( not isinstance(MaxSize, int) ): raise SMLException("Argument 'MaxSize' is not of type 'int'.")
+    self._max  = MaxSize
+    self._tab  = {}
+    self._miss = 0
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def intern(self, Value):
+    """
+    @brief   Return the interned bytes object equal to a value.
+    @param   Value   The identifier (bytes, bytearray or memoryview) or None.
+    @return  The interned bytes object, a new bytes object if the table is full or None if 'Value' is None.
+    """
+    if ( Value == None ): return None
+    vKey = bytes(Value)
+    vRes = self._tab.get(vKey)
+    if ( vRes == None ):
+      if ( len(self._tab) < self._max ):
+        vRes = self._tab.setdefault(vKey, vKey) # setdefault keeps concurrent callers on the same object
+      else:
+        vRes = vKey
+        self._miss += 1
+    return vRes
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def internMssg(self, Mssg):
+    """
+    @brief   Replace the 'ServerId', 'ListName' and 'ObjName' values of a decoded SML_Message by interned ones.
+    @param   Mssg   The decoded SML_Message.
+    """
+    vBdy = Mssg.MessageBody.Element
+    for vNam in ["ServerId", "ListName"]:
+      vElm = getattr(vBdy, vNam, None)
+      if ( isinstance(vElm, SML_OctetString) ): vElm._valu = self.intern(vElm._valu)
+    if ( isinstance(vBdy, SML_GetListRes) and (vBdy.ValList._valu != None) ):
+      for e in vBdy.ValList._valu:
+        e.ObjName._valu = self.intern(e.ObjName._valu)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getSize(self):
+    """
+    @brief   Getter method returning the number of interned identifiers.
+    @return  The number of interned identifiers.
+    """
+    return len(self._tab)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getMisses(self):
+    """
+    @brief   Getter method returning the number of identifiers not interned because the table was full.
+    @return  The number of identifiers not interned.
+    """
+    return self._miss
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  size   = property(getSize)
+  misses = property(getMisses)
+
+########################################################################################################################
+
+class SML_Decoder:
+  """
+  @brief   SML_Decoder class.
+           The decoder keeps no state between calls, so a single instance may be reused and shared between threads.
+           Every call returns a new SML_Telegram that shares no objects with the decoder or with other results, apart
+           from the immutable identifiers of an SML_InternTable.
+  """
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __init__(self, MessageTypes=None, CheckSkipped=False, Compiled=False, Intern=None):
+    """
+    @brief  Constructor.
+    @param  MessageTypes   Collection of SML_MessageBody tags of the SML_Messages to decode, see SML_Telegram.
+    @param  CheckSkipped   Bool value to specify whether the CRC of skipped SML_Messages shall be checked anyway.
+    @param  Compiled       Bool value to specify whether the generated decode functions shall be used, see SML_Telegram.
+    @param  Intern         SML_InternTable shared by all decoded SML_Telegrams, see SML_Telegram.
+    """
+    SML_Telegram(MessageTypes, CheckSkipped, Compiled, Intern) # check the arguments once, generate the decode functions
+    self._mtyp = None if ( MessageTypes == None ) else frozenset(MessageTypes)
+    self._mchk = CheckSkipped
+    self._comp = Compiled
+    self._intn = Intern
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def decode(self, Data):
+    """
+    @brief   Decode a SML telegram.
+             Every error raised for malformed data is a SMLException: SMLExceptionChecksum for a CRC mismatch,
+             SMLException for all others, including the MALFORMED_ERRORS of data the SML objects do not check
+             explicitly. Any other exception is not caused by the data and propagates unchanged.
+    @param   Data   SML byte data list representation of a SML telegram.
+    @return  A new SML_Telegram holding the decoded SML_Messages.
+    """
+    if ( not isinstance(Data, bytearray) ): raise SMLException("Argument 'Data' is not of type 'bytearray'.")
+    vTlg = SML_Telegram(self._mtyp, self._mchk, self._comp, self._intn)
+    try:
+      vTlg.data = Data
+    except MALFORMED_ERRORS as e: # e.g. an unknown Type-Length-Field or a value not fitting its type
+      raise SMLException("Malformed telegram ({}: {}).".format(type(e).__name__, e)) from e
+    return vTlg
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def verify(self, Data, Offsets):
+    """
+    @brief   Check a batch of SML telegrams without decoding them.
+             The whole batch is bit reflected once, then every CRC is calculated by binascii.crc_hqx on a slice of it.
+    @param   Data      Byte data list of all SML telegrams, concatenated.
+    @param   Offsets   Sequence of N+1 indices into 'Data'; telegram i spans from Offsets[i] to Offsets[i+1].
+    @return  A list of N bool values; True for telegrams with correct escape sequences, telegram CRC and CRCs of all
+             SML_Messages.
+    """
+    vBuf = bytes(Data)
+    vRfl = memoryview(vBuf.translate(CRC_REFLECT))
+    vTlg = SML_Telegram()
+    vRes = []
+    def crc(Beg, End):
+      cCrc = binascii.crc_hqx(vRfl[Beg:End], 0xFFFF)
+      return ((CRC_REFLECT[(cCrc&0xFF00)>>8]<<8) | CRC_REFLECT[cCrc&0xFF]) ^ 0xFFFF
+    for i in range(len(Offsets)-1):
+      vBeg = Offsets[i]
+      vEnd = Offsets[i+1]
+      if ( (vEnd - vBeg < 16)                                                                   or
+           (vBuf[vBeg:(vBeg+8)]     != bytes([0x1B, 0x1B, 0x1B, 0x1B, 0x01, 0x01, 0x01, 0x01])) or
+           (vBuf[(vEnd-8):(vEnd-3)] != bytes([0x1B, 0x1B, 0x1B, 0x1B, 0x1A])                  ) or
+           (vBuf[vEnd-3]            >  0x03                                                  ) or
+           (crc(vBeg, vEnd-2)       != int.from_bytes(vBuf[(vEnd-2):vEnd], 'big', signed=False))
+         ):
+        vRes.append(False)
+        continue
+      vPos = vBeg + 8
+      vEoM = vEnd - 8 - vBuf[vEnd-3]
+      try:
+        while ( vPos < vEoM ):
+          vTag,vCrc = vTlg.getMssgTag(vBuf, vPos)
+          vEoC      = vTlg.skipData(vBuf, vCrc)
+          if ( crc(vPos, vCrc) != int.from_bytes(vBuf[(vCrc+1):vEoC], 'big', signed=False) ): break
+          vPos      = vTlg.skipData(vBuf, vEoC)
+      except (SMLException,) + MALFORMED_ERRORS: # malformed message, e.g. a truncated one; reported as invalid
+        pass
+      vRes.append(vPos == vEoM)
+    return vRes
 
 ########################################################################################################################
 ########################################################################################################################
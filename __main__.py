@@ -0,0 +1,245 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import argparse
+import sys
+import time
+
+from . import READING_COLUMNS, SML_Decoder, SML_Framer, SMLException, SMLExceptionChecksum
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+READ_CHUNK_SIZE = 65536
+WORK_BATCH_SIZE = 64
+
+_DECODERS = {} # SML_Decoder of each message selection and engine, created once per process
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+def _format(Telegram, Format):
+  """
+  @brief   Create the output of a decoded SML_Telegram.
+  @param   Telegram   The decoded SML_Telegram.
+  @param   Format     One of 'text', 'ndjson', 'csv' or 'none'.
+  @return  The output text.
+  """
+  if   ( Format == "text"   ):
+    return Telegram.getText()
+  elif ( Format == "ndjson" ):
+    import json
+    return "".join(json.dumps(dict(zip(READING_COLUMNS, r))) + "\n" for r in Telegram.readings)
+  elif ( Format == "csv"    ):
+    import csv
+    import io
+    vOut = io.StringIO()
+    csv.writer(vOut, lineterminator="\n").writerows(Telegram.readings)
+    return vOut.getvalue()
+  else:
+    return ""
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _decoder(Format, Generic):
+  """
+  @brief   Get the SML_Decoder for an output format.
+  @param   Format    The output format, see _format; 'csv' and 'ndjson' only output SML_GetListRes entries, so all
+                     other SML_Messages are skipped.
+  @param   Generic   Bool value to specify whether the generic 'setData' methods shall be used instead of the decode
+                     functions generated by pySML.compiler.
+  @return  The SML_Decoder.
+  """
+  vKey = (Format in ["csv", "ndjson"], Generic)
+  if ( vKey not in _DECODERS ):
+    _DECODERS[vKey] = SML_Decoder(MessageTypes=({0x0701} if ( vKey[0] ) else None), Compiled=(not Generic))
+  return _DECODERS[vKey]
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _work(Frames, Format, Generic=False):
+  """
+  @brief   Decode and format a batch of framed telegrams; runs in the worker processes.
+  @param   Frames    List of framed telegrams.
+  @param   Format    The output format, see _format.
+  @param   Generic   Bool value to specify whether the generic decoding shall be used, see _decoder.
+  @return  A tuple of the output text, the number of decoded telegrams, CRC failures and other failures, as well as
+           the time spent for decoding and formatting.
+  """
+  vDec = _decoder(Format, Generic)
+  vTxt = []
+  vOk  = vCrc = vErr = 0
+  vTmD = vTmF = 0.0
+  for f in Frames:
+    vTm0 = time.perf_counter()
+    try:
+      vTlg = vDec.decode(f)
+    except SMLExceptionChecksum:
+      vCrc += 1; vTmD += time.perf_counter() - vTm0
+      continue
+    except SMLException:
+      vErr += 1; vTmD += time.perf_counter() - vTm0
+      continue
+    vTm1 = time.perf_counter()
+    vTxt.append(_format(vTlg, Format))
+    vTm2 = time.perf_counter()
+    vOk  += 1
+    vTmD += vTm1 - vTm0
+    vTmF += vTm2 - vTm1
+  return ("".join(vTxt), vOk, vCrc, vErr, vTmD, vTmF)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _idle(File):
+  """
+  @brief   Check whether reading a file would wait for more data.
+  @param   File   The binary file object.
+  @return  True if no data is available right now; always False for regular files.
+  """
+  import select
+  try:
+    return not select.select([File], [], [], 0)[0]
+  except (OSError, ValueError): # no file descriptor, or one select does not support, e.g. files on Windows
+    return False
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _batches(Files, Stats):
+  """
+  @brief   Read and frame the capture files.
+  @param   Files   List of capture file names; '-' means stdin.
+  @param   Stats   Dictionary accumulating the 'read' and 'frame' stage times as well as the dropped bytes.
+  @return  A generator of lists of at most WORK_BATCH_SIZE framed telegrams; a shorter list is yielded as soon as the
+           input goes idle, so telegrams of a live stream, e.g. a serial port piped to stdin, are output without delay.
+  """
+  vBat = []
+  for n in Files:
+    vFrm = SML_Framer()
+    vFil = sys.stdin.buffer if ( n == "-" ) else open(n, "rb")
+    try:
+      while True:
+        vTm0 = time.perf_counter()
+        vChk = vFil.read1(READ_CHUNK_SIZE) # returns what is available instead of waiting for a full chunk
+        vTm1 = time.perf_counter()
+        if ( not vChk ): break
+        vBat.extend(vFrm.feed(vChk))
+        vTm2 = time.perf_counter()
+        Stats["read"]  += vTm1 - vTm0
+        Stats["frame"] += vTm2 - vTm1
+        while ( len(vBat) >= WORK_BATCH_SIZE ):
+          yield vBat[:WORK_BATCH_SIZE]
+          vBat = vBat[WORK_BATCH_SIZE:]
+        if ( vBat and _idle(vFil) ):
+          yield vBat
+          vBat = []
+    finally:
+      if ( vFil is not sys.stdin.buffer ): vFil.close()
+    Stats["dropped"] += vFrm.dropped + vFrm.pending
+  if ( vBat ): yield vBat
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _parallel(Executor, Window, Batches, Format, Generic):
+  """
+  @brief   Run _work on the worker processes, keeping the order of the batches.
+  @param   Executor   The concurrent.futures.Executor to submit to.
+  @param   Window     Maximum number of batches in flight, so large captures are not read into memory at once.
+  @param   Batches    Iterable of lists of framed telegrams.
+  @param   Format     The output format, see _format.
+  @param   Generic    Bool value to specify whether the generic decoding shall be used, see _decoder.
+  @return  A generator of the results of _work.
+  """
+  import collections
+  vPnd = collections.deque()
+  for b in Batches:
+    vPnd.append(Executor.submit(_work, b, Format, Generic))
+    if ( len(b) < WORK_BATCH_SIZE ): # the input went idle, so output everything in flight before reading on
+      while ( vPnd ): yield vPnd.popleft().result()
+    elif ( len(vPnd) >= Window ):
+      yield vPnd.popleft().result()
+  while ( vPnd ):
+    yield vPnd.popleft().result()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def main(Argv=None):
+  """
+  @brief   Command line entry point decoding SML capture files.
+  @param   Argv   List of command line arguments; None means sys.argv.
+  @return  The exit status.
+  """
+  vPrs = argparse.ArgumentParser(prog="python -m pySML", description="Decode raw SML captures.")
+  vPrs.add_argument("files",           nargs="*", default=["-"],                          help="capture files; '-' or none reads stdin")
+  vPrs.add_argument("-f", "--format",  default="text", choices=["text", "ndjson", "csv", "none"], help="output format (default: text)")
+  vPrs.add_argument("-j", "--jobs",    type=int, default=1,                               help="number of decoding worker processes (default: 1)")
+  vPrs.add_argument("-o", "--output",  default="-",                                       help="output file; '-' means stdout")
+  vPrs.add_argument("--generic",       action="store_true",                               help="decode by the generic SML objects instead of the generated decode functions")
+  vPrs.add_argument("--stats",         action="store_true",                               help="report throughput, CRC failures and stage times to stderr")
+  vArg = vPrs.parse_args(Argv)
+
+  vSts = {"read":0.0, "frame":0.0, "decode":0.0, "format":0.0, "write":0.0, "dropped":0}
+  vCnt = [0, 0, 0]
+  vTm0 = time.perf_counter()
+  try:
+    vOut = sys.stdout if ( vArg.output == "-" ) else open(vArg.output, "w", newline="")
+    try:
+      if ( vArg.format == "csv" ): vOut.write(",".join(READING_COLUMNS) + "\n")
+      if ( vArg.jobs > 1 ):
+        import concurrent.futures
+        vExe = concurrent.futures.ProcessPoolExecutor(vArg.jobs)
+        vRes = _parallel(vExe, 4*vArg.jobs, _batches(vArg.files, vSts), vArg.format, vArg.generic)
+      else:
+        vExe = None
+        vRes = (_work(b, vArg.format, vArg.generic) for b in _batches(vArg.files, vSts))
+      try:
+        for vTxt,vOk,vCrc,vErr,vTmD,vTmF in vRes:
+          vTm1 = time.perf_counter()
+          vOut.write(vTxt)
+          vOut.flush() # once per batch, so the output of a live stream is not held back
+          vSts["write"]  += time.perf_counter() - vTm1
+          vSts["decode"] += vTmD
+          vSts["format"] += vTmF
+          vCnt[0] += vOk; vCnt[1] += vCrc; vCnt[2] += vErr
+      finally:
+        if ( vExe != None ): vExe.shutdown()
+    finally:
+      if ( vOut is not sys.stdout ): vOut.close()
+  except BrokenPipeError: # e.g. piped into 'head'
+    import os
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno()) # the interpreter flushes stdout again at exit
+    sys.stderr.write("{}: error: output closed\n".format(vPrs.prog))
+    return 1
+  except OSError as e:
+    sys.stderr.write("{}: error: {}\n".format(vPrs.prog, e))
+    return 1
+  vTmT = time.perf_counter() - vTm0
+
+  if ( vArg.stats ):
+    vTot = sum(vCnt)
+    vPct = lambda n: (100.0 * n / vTot) if ( vTot ) else 0.0
+    sys.stderr.write("telegrams      : {} ({} decoded)\n".format(vTot, vCnt[0]))
+    sys.stderr.write("crc failures   : {} ({:.2f} %)\n".format(vCnt[1], vPct(vCnt[1])))
+    sys.stderr.write("other failures : {} ({:.2f} %)\n".format(vCnt[2], vPct(vCnt[2])))
+    sys.stderr.write("dropped bytes  : {}\n".format(vSts["dropped"]))
+    sys.stderr.write("elapsed        : {:.3f} s\n".format(vTmT))
+    sys.stderr.write("throughput     : {:.1f} telegrams/s\n".format(vTot / vTmT if ( vTmT > 0 ) else 0.0))
+    for k in ["read", "frame", "decode", "format", "write"]:
+      sys.stderr.write("stage {:<9}: {:.3f} s\n".format(k, vSts[k]))
+  return 0
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+if ( __name__ == '__main__' ):
+  sys.exit(main())
@@ -0,0 +1,297 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import copy
+import threading
+
+from . import _SML_Type, SMLException
+from . import SML_EndOfMessage, SML_OctetString, SML_Boolean, SML_Integer, SML_Choice, SML_Sequence, SML_Message
+from . import SML_SignedInteger,   SML_SignedInteger08,   SML_SignedInteger16,   SML_SignedInteger32,   SML_SignedInteger64
+from . import SML_UnsignedInteger, SML_UnsignedInteger08, SML_UnsignedInteger16, SML_UnsignedInteger32, SML_UnsignedInteger64
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+_INTEGER = { (True,  2):SML_SignedInteger08,   (True,  3):SML_SignedInteger16,   (True,  5):SML_SignedInteger32,   (True,  9):SML_SignedInteger64,
+             (False, 2):SML_UnsignedInteger08, (False, 3):SML_UnsignedInteger16, (False, 5):SML_UnsignedInteger32, (False, 9):SML_UnsignedInteger64 }
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _slow(Proto, Data, Pos):
+  """
+  @brief   Decode a SML object by the generic 'setData' of a copy of its prototype.
+           Used for everything the generated functions do not handle themselves, e.g. unusual encodings and errors, so
+           that results and raised exceptions are the same as those of the generic decoder.
+  @param   Proto   The prototype of the SML object.
+  @param   Data    Immutable SML byte data list (bytes); the decoded SML objects refer to it.
+  @param   Pos     Index of the first byte of the SML object.
+  @return  A list of the decoded SML object and the index of the first byte following it.
+  """
+  vObj      = copy.deepcopy(Proto)
+  vObj.data = bytearray(Data[Pos:])
+  vObj.setRaw(Data, Pos)
+  return [vObj, Pos + vObj.datalen]
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _implicit(Class, Proto, Data, Pos):
+  """
+  @brief   Decode an implicit SML_Choice, which selects the class of its element by the Type-Length-Field.
+  @param   Class   The SML_Choice class.
+  @param   Proto   The prototype of the SML_Choice.
+  @param   Data    Immutable SML byte data list (bytes); the decoded SML objects refer to it.
+  @param   Pos     Index of the first byte of the SML_Choice.
+  @return  A list of the decoded SML_Choice and the index of the first byte following it.
+  """
+  vByt = Data[Pos]
+  if ( vByt == 0x01 ):
+    vElm = None
+    vLen = 1
+  else:
+    vTyp = vByt & 0x70
+    vLen = vByt & 0x0F
+    if ( (vByt & 0x80) or (vLen < 2) or (Pos+vLen > len(Data)) ): return _slow(Proto, Data, Pos)
+    if   ( vTyp == 0x00 ):
+      vElm = object.__new__(SML_OctetString)
+      vElm.__dict__ = {"_type":_SML_Type.OctetString, "_valu":bytearray(Data[(Pos+1):(Pos+vLen)]), "_raw":Data, "_off":Pos}
+    elif ( (vTyp == 0x40) and (vLen == 2) ):
+      vElm = object.__new__(SML_Boolean)
+      vElm.__dict__ = {"_type":_SML_Type.Boolean, "_valu":Data[Pos+1], "_raw":Data, "_off":Pos}
+    elif ( (vTyp == 0x50) or (vTyp == 0x60) ):
+      vSgn = (vTyp == 0x50)
+      vElm = object.__new__(_INTEGER.get((vSgn, vLen), {True:SML_SignedInteger, False:SML_UnsignedInteger}[vSgn]))
+      vElm.__dict__ = {"_type":_SML_Type(vTyp), "_valu":int.from_bytes(Data[(Pos+1):(Pos+vLen)], 'big', signed=vSgn), "_nbytes":vLen-1, "_raw":Data, "_off":Pos}
+    else:
+      return _slow(Proto, Data, Pos)
+  vObj = object.__new__(Class)
+  vObj.__dict__ = {"_type":_SML_Type.Sequence, "_typ":"implicit", "_tag":None, "_map":None, "_par":vObj, "_valu":vElm, "Element":vElm, "_raw":Data, "_off":Pos}
+  return [vObj, Pos + vLen]
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+class SML_Compiler:
+  """
+  @brief   SML_Compiler class.
+           Generates, compiles and caches a specialised decode function for each SML_Sequence and explicit SML_Choice
+           class, with the sequence of its elements unrolled. The functions build the same SML objects as the generic
+           'setData' methods; whatever they do not handle themselves is passed on to the generic decoder.
+  """
+
+  _default = None
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __init__(self):
+    """
+    @brief   Constructor.
+    """
+    self._func = {}
+    self._lock = threading.RLock()
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  @staticmethod
+  def getDefault():
+    """
+    @brief   Getter method returning the SML_Compiler shared by all SML_Telegrams of the process.
+    @return  The shared SML_Compiler.
+    """
+    if ( SML_Compiler._default == None ): SML_Compiler._default = SML_Compiler()
+    return SML_Compiler._default
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getFunc(self, Class):
+    """
+    @brief   Getter method returning the decode function of a SML class; it is generated on first use.
+    @param   Class   A SML_Sequence or explicit SML_Choice class that can be constructed without arguments.
+    @return  A function 'decode(Data, Pos)' returning a list of the decoded SML object and the index of the first
+             byte following it. 'Data' has to be immutable (bytes), as the decoded SML objects refer to it.
+    """
+    vFnc = self._func.get(Class)
+    if ( vFnc == None ):
+      with self._lock:
+        vFnc = self._func.get(Class)
+        if ( vFnc == None ):
+          vFnc = self._compile(Class)
+          self._func[Class] = vFnc
+    return vFnc
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getSource(self, Class):
+    """
+    @brief   Getter method returning the generated source code of the decode function of a SML class.
+    @param   Class   A SML_Sequence or explicit SML_Choice class that can be constructed without arguments.
+    @return  The source code.
+    """
+    return self._generate(Class)[0]
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _compile(self, Class):
+    """
+    @brief   Generate and compile the decode function of a SML class.
+    @param   Class   A SML_Sequence or explicit SML_Choice class that can be constructed without arguments.
+    @return  The decode function.
+    """
+    vSrc,vNsp = self._generate(Class)
+    exec(compile(vSrc, "<pySML.compiler {}>".format(Class.__name__), "exec"), vNsp)
+    return vNsp["decode"]
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _generate(self, Class):
+    """
+    @brief   Generate the source code of the decode function of a SML class.
+    @param   Class   A SML_Sequence or explicit SML_Choice class that can be constructed without arguments.
+    @return  A list of the source code and the namespace to execute it in.
+    """
+    vPrt = Class()
+    vNsp = {"_new":object.__new__, "_int":int.from_bytes, "_slow":_slow, "_implicit":_implicit, "C":Class, "P":vPrt, "SEQ":_SML_Type.Sequence}
+    vSrc = ["def decode(D, p):",
+            "  p0 = p",
+            "  try:"]
+    if   ( isinstance(vPrt, SML_Sequence) and (vPrt._name != None) ):
+      vTl  = vPrt.encodeTl(vPrt.type, len(vPrt._valu))
+      vNsp["NAMES"] = tuple(vPrt._name)
+      vNsp["TL"]    = bytes(vTl)
+      vSrc += ["    if ( D[p:p+{}] != TL ): return _slow(P, D, p0)".format(len(vTl)),
+               "    p += {}".format(len(vTl))]
+      for i,e in enumerate(vPrt._valu):
+        vSrc += self._field("e{}".format(i), e, vNsp, "    ")
+      if ( isinstance(vPrt, SML_Message) ):
+        vNsp["_crc"] = vPrt.crc
+        vSrc += ["    if ( e{}._valu != _crc(D[p0:p-4]) ): return _slow(P, D, p0)".format(vPrt._name.index("Crc"))]
+      vVal = ", ".join("e{}".format(i) for i in range(len(vPrt._valu)))
+      vAtt = ", ".join("NAMES[{0}]:e{0}".format(i) for i in range(len(vPrt._valu)))
+      vSrc += ["  except IndexError:",
+               "    return _slow(P, D, p0)",
+               "  o = _new(C)",
+               "  o.__dict__ = {{'_type':SEQ, '_name':list(NAMES), '_valu':[{}], {}, '_raw':D, '_off':p0}}".format(vVal, vAtt),
+               "  return [o, p]"]
+    elif ( isinstance(vPrt, SML_Sequence) ):
+      vNsp["TL"]   = {}
+      vNsp["tl"]   = vPrt.encodeTl
+      vNsp["f"]    = self._elementFunc(vPrt._objc, vNsp, "P_objc")
+      vSrc += ["    b = D[p]",
+               "    if ( b < 0x80 ): n = b & 0x0F",
+               "    else:",
+               "      n = 0; k = p",
+               "      while ( D[k] & 0x80 ): n = (n << 4) | (D[k] & 0x0F); k += 1",
+               "      n = (n << 4) | (D[k] & 0x0F)",
+               "    t = TL.get(n)",
+               "    if ( t == None ): t = TL.setdefault(n, bytes(tl(SEQ, n)))",
+               "    if ( D[p:p+len(t)] != t ): return _slow(P, D, p0)",
+               "    p += len(t)",
+               "    v = []",
+               "    for i in range(n):",
+               "      e,p = f(D, p)",
+               "      v.append(e)",
+               "  except IndexError:",
+               "    return _slow(P, D, p0)",
+               "  o = _new(C)",
+               "  o.__dict__ = {'_type':SEQ, '_name':None, '_valu':v, '_objc':P._objc, '_raw':D, '_off':p0}",
+               "  return [o, p]"]
+    elif ( isinstance(vPrt, SML_Choice) and (vPrt._typ == "explicit") ):
+      vSrc += ["    if ( D[p] == 0x01 ):",
+               "      t = _new(type(P._tag)); t.__dict__ = dict(P._tag.__dict__)",
+               "      o = _new(C)",
+               "      o.__dict__ = {'_type':SEQ, '_typ':'explicit', '_tag':t, '_map':P._map, '_par':o, '_valu':None, 'Element':None, '_raw':D, '_off':p}",
+               "      return [o, p+1]",
+               "    if ( D[p] != 0x{:02X} ): return _slow(P, D, p0)".format(vPrt.encodeTl(vPrt.type, 2)[0]),
+               "    p += 1"]
+      vSrc += self._field("t", vPrt._tag, vNsp, "    ")
+      vCnd = "if  "
+      for k,e in vPrt._map.items():
+        vSrc += ["    {} ( t._valu == 0x{:X} ):".format(vCnd, k)]
+        vSrc += self._field("e{:X}".format(k), e, vNsp, "      ")
+        vSrc += ["      e = e{:X}".format(k)]
+        vCnd = "elif"
+      vSrc += ["    else:",
+               "      return _slow(P, D, p0)",
+               "  except IndexError:",
+               "    return _slow(P, D, p0)",
+               "  o = _new(C)",
+               "  o.__dict__ = {'_type':SEQ, '_typ':'explicit', '_tag':t, '_map':P._map, '_par':o, '_valu':e, 'Element':e, '_raw':D, '_off':p0}",
+               "  return [o, p]"]
+    else:
+      raise SMLException("Argument 'Class' is no 'SML_Sequence' or explicit 'SML_Choice' class.")
+    return ["\n".join(vSrc) + "\n", vNsp]
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _elementFunc(self, Proto, Namespace, Name):
+    """
+    @brief   Provide a decode function for an element of a SML_Sequence or SML_Choice in a namespace.
+    @param   Proto       The prototype of the element.
+    @param   Namespace   The namespace of the generated function.
+    @param   Name        The name under which the prototype is added to the namespace.
+    @return  The decode function of the element.
+    """
+    Namespace[Name] = Proto
+    if ( type(Proto) in (SML_Sequence, SML_Choice) ):
+      return lambda D, p: _slow(Proto, D, p) # no subclass, so it can not be constructed without arguments
+    return self.getFunc(type(Proto))
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _field(self, Var, Proto, Namespace, Indent):
+    """
+    @brief   Generate the source code decoding one element of a SML_Sequence or SML_Choice.
+    @param   Var         Name of the variable to assign the decoded element to.
+    @param   Proto       The prototype of the element.
+    @param   Namespace   The namespace of the generated function; constants used by the source code are added.
+    @param   Indent      The indentation of the generated source code.
+    @return  A list of source code lines; they advance 'p' to the first byte following the element.
+    """
+    vPrt = "P_" + Var
+    vCls = "C_" + Var
+    Namespace[vPrt] = Proto
+    Namespace[vCls] = type(Proto)
+    if   ( type(Proto) == SML_EndOfMessage ):
+      vSrc = ["if ( D[p] != 0x00 ): return _slow(P, D, p0)",
+              "{0} = _new({1}); {0}.__dict__ = {{'_valu':0}}; p += 1".format(Var, vCls)]
+    elif ( type(Proto) == SML_OctetString ):
+      Namespace["OS"] = _SML_Type.OctetString
+      vSrc = ["b = D[p]",
+              "if   ( b == 0x01 ):",
+              "  {0} = _new({1}); {0}.__dict__ = {{'_type':OS, '_valu':None, '_raw':D, '_off':p}}; p += 1".format(Var, vCls),
+              "elif ( (0x02 <= b <= 0x0F) and (p+b <= len(D)) ):",
+              "  {0} = _new({1}); {0}.__dict__ = {{'_type':OS, '_valu':bytearray(D[p+1:p+b]), '_raw':D, '_off':p}}; p += b".format(Var, vCls),
+              "else:",
+              "  {0},p = _slow({1}, D, p)".format(Var, vPrt)]
+    elif ( type(Proto) == SML_Boolean ):
+      Namespace["BOOL"] = _SML_Type.Boolean
+      vSrc = ["b = D[p]",
+              "if   ( b == 0x01 ):",
+              "  {0} = _new({1}); {0}.__dict__ = {{'_type':BOOL, '_valu':None, '_raw':D, '_off':p}}; p += 1".format(Var, vCls),
+              "elif ( b == 0x42 ):",
+              "  {0} = _new({1}); {0}.__dict__ = {{'_type':BOOL, '_valu':D[p+1], '_raw':D, '_off':p}}; p += 2".format(Var, vCls),
+              "else:",
+              "  {0},p = _slow({1}, D, p)".format(Var, vPrt)]
+    elif ( isinstance(Proto, SML_Integer) and (Proto._nbytes != None) ):
+      vTyp = "T_" + Var
+      vNby = Proto._nbytes
+      Namespace[vTyp] = Proto.type
+      vSrc = ["b = D[p]",
+              "if   ( b == 0x01 ):",
+              "  {0} = _new({1}); {0}.__dict__ = {{'_type':{2}, '_valu':None, '_nbytes':{3}, '_raw':D, '_off':p}}; p += 1".format(Var, vCls, vTyp, vNby),
+              "elif ( (b == 0x{:02X}) and (p+{} <= len(D)) ):".format(Proto.encodeTl(Proto.type, vNby)[0], vNby+1),
+              "  {0} = _new({1}); {0}.__dict__ = {{'_type':{2}, '_valu':_int(D[p+1:p+{4}], 'big', signed={5}), '_nbytes':{3}, '_raw':D, '_off':p}}; p += {4}".format(Var, vCls, vTyp, vNby, vNby+1, Proto.isSigned),
+              "else:",
+              "  {0},p = _slow({1}, D, p)".format(Var, vPrt)]
+    elif ( isinstance(Proto, SML_Choice) and (Proto._typ == "implicit") ):
+      vSrc = ["{0},p = _implicit({1}, {2}, D, p)".format(Var, vCls, vPrt)]
+    else:
+      vFnc = "F_" + Var
+      Namespace[vFnc] = self._elementFunc(Proto, Namespace, vPrt)
+      vSrc = ["{0},p = {1}(D, p)".format(Var, vFnc)]
+    return [Indent + l for l in vSrc]
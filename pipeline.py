@@ -0,0 +1,312 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import multiprocessing
+import multiprocessing.shared_memory
+import struct
+
+from . import SML_Decoder, SML_Framer, SMLException, SMLExceptionChecksum
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+READ_CHUNK_SIZE = 4096
+
+_HEADER  = struct.Struct("<9Q") # write position, read position, put, overflow, dropped, decoded, crc failed, failed,
+                                # handler failed
+_LENGTH  = struct.Struct("<I")
+_WRAP    = 0xFFFFFFFF           # record length marking the rest of the ring as unused
+
+_WPOS, _RPOS, _PUT, _OVERFLOW, _DROPPED, _DECODED, _CRCFAILED, _FAILED, _HDLFAILED = range(9)
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+class SML_RingBuffer:
+  """
+  @brief   SML_RingBuffer class.
+           A ring buffer of variable sized records in a multiprocessing.shared_memory block, shared by producer and
+           consumer processes. Producers never wait for free space; a record not fitting into the ring is dropped and
+           counted as overflow. The counters of the pipeline are kept in the header of the block.
+  """
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __init__(self, Size=1<<20, Context=None):
+    """
+    @brief   Constructor creating a new shared memory block.
+    @param   Size      Number of bytes of the ring; each record takes 4 bytes more than its data.
+    @param   Context   multiprocessing context to create the locks with; None means the default context.
+    """
+    if ( not isinstance(Size, int) or (Size < 64) ): raise SMLException("Argument 'Size' is not of type 'int' or less than 64.")
+    vCtx       = multiprocessing.get_context() if ( Context == None ) else Context
+    self._size = Size
+    self._shm  = multiprocessing.shared_memory.SharedMemory(create=True, size=_HEADER.size+Size)
+    self._own  = True
+    self._wlk  = vCtx.Lock()         # serialises producers
+    self._rlk  = vCtx.Lock()         # serialises consumers
+    self._itm  = vCtx.Semaphore(0)   # number of records in the ring
+    _HEADER.pack_into(self._shm.buf, 0, *([0]*9))
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __getstate__(self):
+    return (self._shm.name, self._size, self._wlk, self._rlk, self._itm)
+
+  def __setstate__(self, State):
+    vNam,self._size,self._wlk,self._rlk,self._itm = State
+    try:
+      self._shm = multiprocessing.shared_memory.SharedMemory(name=vNam, track=False)
+    except TypeError: # before Python 3.13 attaching registers the block with the resource tracker as if it was created
+      from multiprocessing import resource_tracker
+      self._shm = multiprocessing.shared_memory.SharedMemory(name=vNam)
+      resource_tracker.unregister(self._shm._name, "shared_memory")
+    self._own = False
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _get(self, Field):
+    return struct.unpack_from("<Q", self._shm.buf, 8*Field)[0]
+
+  def _set(self, Field, Value):
+    struct.pack_into("<Q", self._shm.buf, 8*Field, Value)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def put(self, Data):
+    """
+    @brief   Append a record without waiting for free space.
+    @param   Data   The record (bytes, bytearray or memoryview).
+    @return  True if the record was appended, False if it was dropped because the ring is full.
+    """
+    vLen = len(Data)
+    vRec = _LENGTH.size + vLen
+    vBuf = self._shm.buf
+    with self._wlk:
+      vWps = self._get(_WPOS)
+      vIdx = vWps % self._size
+      vPad = (self._size - vIdx) if ( self._size - vIdx < vRec ) else 0 # records are not split at the end of the ring
+      if ( vWps + vPad + vRec - self._get(_RPOS) > self._size ):
+        self._set(_OVERFLOW, self._get(_OVERFLOW) + 1)
+        return False
+      if ( vPad ):
+        if ( vPad >= _LENGTH.size ): _LENGTH.pack_into(vBuf, _HEADER.size+vIdx, _WRAP)
+        vIdx = 0
+      vOff = _HEADER.size + vIdx
+      _LENGTH.pack_into(vBuf, vOff, vLen)
+      vBuf[(vOff+_LENGTH.size):(vOff+vRec)] = Data
+      self._set(_WPOS, vWps + vPad + vRec)
+      self._set(_PUT,  self._get(_PUT) + 1)
+    self._itm.release()
+    return True
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def get(self, Timeout=None):
+    """
+    @brief   Remove the oldest record.
+    @param   Timeout   Maximum number of seconds to wait for a record; None means wait forever.
+    @return  The record as bytearray, the form SML_Decoder.decode takes, or None if none arrived within 'Timeout'.
+    """
+    if ( not self._itm.acquire(timeout=Timeout) ): return None
+    vBuf = self._shm.buf
+    with self._rlk:
+      vRps = self._get(_RPOS)
+      vIdx = vRps % self._size
+      vEnd = self._size - vIdx
+      if ( (vEnd < _LENGTH.size) or (_LENGTH.unpack_from(vBuf, _HEADER.size+vIdx)[0] == _WRAP) ):
+        vRps = vRps + vEnd
+        vIdx = 0
+      vOff = _HEADER.size + vIdx
+      vLen = _LENGTH.unpack_from(vBuf, vOff)[0]
+      vRes = bytearray(vBuf[(vOff+_LENGTH.size):(vOff+_LENGTH.size+vLen)])
+      self._set(_RPOS, vRps + _LENGTH.size + vLen)
+    return vRes
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def count(self, Field, Number=1):
+    """
+    @brief   Add to one of the counters in the header of the ring.
+    @param   Field    Index of the counter; _DROPPED, _DECODED, _CRCFAILED, _FAILED or _HDLFAILED.
+    @param   Number   The number to add.
+    """
+    vLck = self._wlk if ( Field == _DROPPED ) else self._rlk # each counter is only written under one of the locks
+    with vLck:
+      self._set(Field, self._get(Field) + Number)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getPending(self):
+    """
+    @brief   Getter method returning the number of bytes used by records not yet removed.
+    @return  The number of used bytes.
+    """
+    return self._get(_WPOS) - self._get(_RPOS)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getStats(self):
+    """
+    @brief   Getter method returning the counters.
+    @return  A dict of the number of telegrams 'put' into the ring, dropped by 'overflow' of the ring, 'decoded',
+             failed by CRC ('crc_failed') or otherwise ('failed'), raising an exception in the handler
+             ('handler_failed'), the bytes 'dropped' by the framers and the bytes 'pending' in the ring.
+    """
+    vHdr = _HEADER.unpack_from(self._shm.buf, 0)
+    return {"put":vHdr[_PUT], "overflow":vHdr[_OVERFLOW], "dropped":vHdr[_DROPPED], "decoded":vHdr[_DECODED],
+            "crc_failed":vHdr[_CRCFAILED], "failed":vHdr[_FAILED], "handler_failed":vHdr[_HDLFAILED],
+            "pending":vHdr[_WPOS]-vHdr[_RPOS]}
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def close(self):
+    """
+    @brief   Detach from the shared memory block; the creating instance also destroys it.
+    """
+    self._shm.close()
+    if ( self._own ): self._shm.unlink()
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  pending = property(getPending)
+  stats   = property(getStats)
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+def _reader(Source, Ring, Stop):
+  """
+  @brief   Reader process: read a source, split it into telegrams and put them into the ring.
+  @param   Source   Path of the source, e.g. a serial device configured beforehand, a named pipe or a capture file.
+  @param   Ring     The SML_RingBuffer.
+  @param   Stop     multiprocessing.Event requesting the reader to end.
+  """
+  vFrm = SML_Framer()
+  vDrp = 0 # dropped bytes already counted
+  with open(Source, "rb", buffering=0) as vFil:
+    while ( not Stop.is_set() ):
+      vChk = vFil.read(READ_CHUNK_SIZE)
+      if ( not vChk ): break
+      for t in vFrm.feed(vChk):
+        Ring.put(t)
+      if ( vFrm.dropped != vDrp ):
+        Ring.count(_DROPPED, vFrm.dropped - vDrp)
+        vDrp = vFrm.dropped
+  Ring.count(_DROPPED, vFrm.dropped - vDrp + vFrm.pending)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _worker(Ring, Stop, Handler, Options):
+  """
+  @brief   Decoder process: decode the telegrams of the ring until it is empty and the readers have ended.
+  @param   Ring      The SML_RingBuffer.
+  @param   Stop      multiprocessing.Event set once all readers have ended.
+  @param   Handler   Callable receiving each decoded SML_Telegram; None means the telegrams are only counted.
+  @param   Options   Dict of keyword arguments of SML_Decoder.
+  """
+  vDec = SML_Decoder(**Options)
+  while True:
+    vDat = Ring.get(Timeout=0.1)
+    if ( vDat == None ):
+      if ( Stop.is_set() and (Ring.pending == 0) ): break
+      continue
+    try:
+      vTlg = vDec.decode(vDat)
+    except SMLExceptionChecksum:
+      Ring.count(_CRCFAILED)
+      continue
+    except SMLException:
+      Ring.count(_FAILED)
+      continue
+    Ring.count(_DECODED)
+    if ( Handler != None ):
+      try:
+        Handler(vTlg)
+      except Exception: # a failing handler must not end the decoder, the ring would fill up
+        Ring.count(_HDLFAILED)
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+class SML_Pipeline:
+  """
+  @brief   SML_Pipeline class.
+           Reader processes split their sources into telegrams by SML_Framer and put them into a SML_RingBuffer;
+           decoder processes take them from there and decode them by SML_Decoder. No telegram is pickled on its way,
+           and a reader never waits for the decoders: if the ring is full the telegram is dropped and counted.
+  """
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __init__(self, Sources, Handler=None, Workers=1, Size=1<<20, Options=None):
+    """
+    @brief   Constructor.
+    @param   Sources   List of paths to read, one reader process each.
+    @param   Handler   Callable receiving each decoded SML_Telegram in a decoder process; it must be picklable if the
+                       multiprocessing start method is not 'fork'; exceptions it raises are counted as
+                       'handler_failed'. None means the telegrams are only counted.
+    @param   Workers   Number of decoder processes.
+    @param   Size      Number of bytes of the SML_RingBuffer.
+    @param   Options   Dict of keyword arguments of SML_Decoder, e.g. {"Compiled":True}.
+    """
+    if ( not isinstance(Workers, int) or (Workers < 1) ): raise SMLException("Argument 'Workers' is not of type 'int' or less than 1.")
+    vCtx       = multiprocessing.get_context()
+    self._ring = SML_RingBuffer(Size, vCtx)
+    self._rstp = vCtx.Event()
+    self._wstp = vCtx.Event()
+    self._rdrs = [vCtx.Process(target=_reader, args=(s, self._ring, self._rstp), daemon=True) for s in Sources]
+    self._wrks = [vCtx.Process(target=_worker, args=(self._ring, self._wstp, Handler, Options or {}), daemon=True) for i in range(Workers)]
+    self._stat = None
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def start(self):
+    """
+    @brief   Start the decoder and reader processes.
+    """
+    for p in self._wrks + self._rdrs: p.start()
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def join(self, Timeout=None):
+    """
+    @brief   Wait for the readers to reach the end of their sources, then for the decoders to empty the ring.
+    @param   Timeout   Maximum number of seconds to wait for each reader; None means wait forever.
+    @return  The counters, see getStats.
+    """
+    for p in self._rdrs: p.join(Timeout)
+    return self.stop()
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def stop(self):
+    """
+    @brief   End the readers, let the decoders empty the ring and release the shared memory block.
+    @return  The counters, see getStats.
+    """
+    if ( self._stat != None ): return self._stat
+    self._rstp.set()
+    for p in self._rdrs:
+      p.join(1.0)
+      if ( p.is_alive() ): p.terminate() # blocked in a read of a silent source
+      p.join()
+    self._wstp.set()
+    for p in self._wrks: p.join()
+    self._stat = self._ring.stats
+    self._ring.close()
+    return self._stat
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getStats(self):
+    """
+    @brief   Getter method returning the counters, see SML_RingBuffer.getStats.
+    @return  The counters; after stop they are final.
+    """
+    return self._ring.stats if ( self._stat == None ) else self._stat
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  stats = property(getStats)
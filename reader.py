@@ -0,0 +1,289 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import os
+import queue
+import selectors
+import socket
+import time
+
+from . import SML_Framer, SMLException, SMLExceptionChecksum
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+READ_BUFFER_SIZE = 4096
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+class _SML_Port:
+  """
+  @brief   _SML_Port class.
+           State of one source of a SML_Reader: its reusable read buffer, its SML_Framer and its counters.
+  """
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __init__(self, Name, Source, Fd, Owned, Size):
+    """
+    @brief   Constructor.
+    @param   Name     Name of the port passed along with its telegrams.
+    @param   Source   The socket.socket, or the file descriptor of all other sources.
+    @param   Fd       The file descriptor registered with the selector.
+    @param   Owned    Bool value to specify whether the SML_Reader opened the source and has to close it.
+    @param   Size     Number of bytes of the read buffer.
+    """
+    self.name  = Name
+    self.src   = Source
+    self.fd    = Fd
+    self.own   = Owned
+    self.buf   = bytearray(Size)
+    self.view  = memoryview(self.buf)
+    self.frm   = SML_Framer()
+    self.cnt   = {"bytes":0, "telegrams":0, "crc_failed":0, "failed":0, "queue_full":0}
+    if ( isinstance(Source, socket.socket) ): self.read = Source.recv_into
+    else                                    : self.read = lambda b, f=Fd: os.readv(f, [b])
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getStats(self):
+    """
+    @brief   Getter method returning the counters of the port, see SML_Reader.getStats.
+    @return  A dict of the counters.
+    """
+    vRes = dict(self.cnt)
+    vRes["dropped"] = self.frm.dropped
+    vRes["pending"] = self.frm.pending
+    return vRes
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def close(self):
+    """
+    @brief   Close the source if the SML_Reader opened it; sources of the caller stay open.
+    """
+    if   ( not self.own                           ): pass
+    elif ( isinstance(self.src, socket.socket)    ): self.src.close()
+    else                                           : os.close(self.src)
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+class SML_Reader:
+  """
+  @brief   SML_Reader class.
+           Reads many sources (serial devices, TCP sockets, ptys, pipes) in a single thread multiplexed by selectors.
+           Every source has its own SML_Framer and a read buffer that is reused for every read. Each complete telegram
+           is passed to a callback or put into a queue, together with the name of its source; with a SML_Decoder it is
+           decoded beforehand and telegrams failing to decode are only counted.
+  """
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __init__(self, Handler=None, Queue=None, Decoder=None, BufferSize=READ_BUFFER_SIZE):
+    """
+    @brief   Constructor.
+    @param   Handler      Callable receiving the name of the source and each telegram.
+    @param   Queue        queue.Queue each (name, telegram) tuple is put into without waiting; if it is full the
+                          telegram is dropped and counted as 'queue_full'. Exactly one of 'Handler' and 'Queue' is
+                          required.
+    @param   Decoder      SML_Decoder the telegrams are decoded by; None means the telegrams are passed as bytearray.
+    @param   BufferSize   Number of bytes of the read buffer of each source.
+    """
+    if ( (Handler == None) == (Queue == None)                  ): raise SMLException("Exactly one of the arguments 'Handler' and 'Queue' is required.")
+    if ( not isinstance(BufferSize, int) or (BufferSize < 1)   ): raise SMLException("Argument 'BufferSize' is not of type 'int' or less than 1.")
+    self._hdl  = Handler
+    self._que  = Queue
+    self._dec  = Decoder
+    self._bsiz = BufferSize
+    self._sel  = selectors.DefaultSelector()
+    self._prts = {} # name -> _SML_Port
+    self._gone = {} # name -> counters of the removed ports
+    self._stop = False
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *Args):
+    self.close()
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def add(self, Source, Name=None):
+    """
+    @brief   Add a source. Sources given by path or (host, port) are opened and closed by the SML_Reader, all others
+             stay owned by the caller. Serial devices must be configured beforehand, e.g. by 'stty'.
+    @param   Source   Path of a device or named pipe, (host, port) tuple of a TCP server, socket.socket, file
+                      descriptor or object with a 'fileno' method, e.g. a serial.Serial.
+    @param   Name     Name of the source; None means the path, the (host, port) tuple or the file descriptor.
+    @return  The name of the source.
+    """
+    if   ( isinstance(Source, str)           ):
+      vSrc = os.open(Source, os.O_RDONLY | os.O_NOCTTY | os.O_NONBLOCK)
+      vFd  = vSrc
+      vOwn = True
+    elif ( isinstance(Source, tuple)         ):
+      vSrc = socket.create_connection(Source)
+      vSrc.setblocking(False)
+      vFd  = vSrc.fileno()
+      vOwn = True
+    elif ( isinstance(Source, socket.socket) ):
+      Source.setblocking(False)
+      vSrc = Source
+      vFd  = Source.fileno()
+      vOwn = False
+    elif ( isinstance(Source, int)           ):
+      vSrc = Source
+      vFd  = Source
+      vOwn = False
+    elif ( hasattr(Source, "fileno")         ):
+      vSrc = Source.fileno()
+      vFd  = vSrc
+      vOwn = False
+    else:
+      raise SMLException("Argument 'Source' is not a path, (host, port) tuple, socket, file descriptor or file object.")
+    vNam = (vFd if ( not vOwn ) else Source) if ( Name == None ) else Name
+    if ( vNam in self._prts ):
+      if ( vOwn ): _SML_Port(vNam, vSrc, vFd, vOwn, 1).close()
+      raise SMLException("Source '{}' was already added.".format(vNam))
+    vPrt = _SML_Port(vNam, vSrc, vFd, vOwn, self._bsiz)
+    self._sel.register(vFd, selectors.EVENT_READ, vPrt)
+    self._prts[vNam] = vPrt
+    return vNam
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def remove(self, Name):
+    """
+    @brief   Remove a source and close it if the SML_Reader opened it. Bytes of an incomplete telegram are discarded.
+    @param   Name   The name of the source.
+    """
+    vPrt = self._prts.pop(Name)
+    self._sel.unregister(vPrt.fd)
+    vPrt.close()
+    self._gone[Name] = vPrt.getStats()
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _dispatch(self, Port, Data):
+    """
+    @brief   Decode a telegram if required and pass it on.
+    @param   Port   The _SML_Port the telegram was read from.
+    @param   Data   The telegram as bytearray.
+    """
+    if ( self._dec != None ):
+      try:
+        Data = self._dec.decode(Data)
+      except SMLExceptionChecksum:
+        Port.cnt["crc_failed"] += 1
+        return
+      except SMLException:
+        Port.cnt["failed"] += 1
+        return
+    if ( self._hdl != None ):
+      self._hdl(Port.name, Data)
+    else:
+      try:
+        self._que.put_nowait((Port.name, Data))
+      except queue.Full:
+        Port.cnt["queue_full"] += 1
+        return
+    Port.cnt["telegrams"] += 1 # only once it was handed over
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def poll(self, Timeout=None):
+    """
+    @brief   Wait for readable sources once and process everything read from them. A source reaching its end or
+             failing to read is removed.
+    @param   Timeout   Maximum number of seconds to wait; None means wait until a source is readable.
+    @return  The number of telegrams read.
+    """
+    vRes = 0
+    for k,ev in self._sel.select(Timeout):
+      vPrt = k.data
+      try:
+        vLen = vPrt.read(vPrt.buf)
+      except (BlockingIOError, InterruptedError):
+        continue
+      except OSError: # e.g. EIO of a pty whose other side was closed
+        vLen = 0
+      if ( vLen == 0 ):
+        self.remove(vPrt.name)
+        continue
+      vPrt.cnt["bytes"] += vLen
+      for t in vPrt.frm.feed(vPrt.view[:vLen]):
+        vRes += 1
+        self._dispatch(vPrt, t)
+    return vRes
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def run(self, Duration=None):
+    """
+    @brief   Process the sources until stop is called, 'Duration' has passed or no source is left.
+    @param   Duration   Maximum number of seconds to run; None means no limit.
+    @return  The counters, see getStats.
+    """
+    self._stop = False
+    vEnd = None if ( Duration == None ) else time.monotonic() + Duration
+    while ( (not self._stop) and self._prts ):
+      vTmo = 0.1 if ( vEnd == None ) else min(0.1, vEnd - time.monotonic()) # returns in time for stop
+      if ( vTmo < 0 ): break
+      self.poll(vTmo)
+    return self.stats
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def stop(self):
+    """
+    @brief   Request run to return; may be called from the handler or another thread.
+    """
+    self._stop = True
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def close(self):
+    """
+    @brief   Remove all sources and close the selector.
+    @return  The counters, see getStats.
+    """
+    for n in list(self._prts): self.remove(n)
+    self._sel.close()
+    return self.stats
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getNames(self):
+    """
+    @brief   Getter method returning the names of the current sources.
+    @return  A list of the names.
+    """
+    return list(self._prts)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getStats(self, Name=None):
+    """
+    @brief   Getter method returning the counters.
+    @param   Name   The name of a current or removed source; None means the sum over all sources.
+    @return  A dict of the 'bytes' read, the 'telegrams' passed on, the telegrams 'crc_failed' or otherwise 'failed' to
+             decode or dropped because the queue was full ('queue_full'), and of the bytes 'dropped' by the framers
+             and 'pending' in them.
+    """
+    if ( Name != None ):
+      return self._prts[Name].getStats() if ( Name in self._prts ) else dict(self._gone[Name])
+    vRes = {"bytes":0, "telegrams":0, "crc_failed":0, "failed":0, "queue_full":0, "dropped":0, "pending":0}
+    for s in [p.getStats() for p in self._prts.values()] + list(self._gone.values()):
+      for k in vRes: vRes[k] += s[k]
+    return vRes
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  names = property(getNames)
+  stats = property(getStats)
@@ -0,0 +1,426 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import collections
+import os
+import random
+import select
+import socket
+import struct
+import threading
+import time
+
+from . import SML_Telegram, SML_Message, SML_PublicOpenRes, SML_PublicCloseRes, SML_GetListRes, SML_ValueEntry
+from . import SML_SignedInteger64, SML_UnsignedInteger32, SML_Decoder, SMLException
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+# (OBIS code, unit, scaler, initial value, increment per telegram); a negative increment varies the value by up to its
+# absolute value instead of counting up
+DEFAULT_VALUES  = [ (bytes([1, 0, 1, 8, 0, 255]),  30, -1, 100000,   25),   # energy import, Wh
+                    (bytes([1, 0, 2, 8, 0, 255]),  30, -1,   5000,    0),   # energy export, Wh
+                    (bytes([1, 0, 16, 7, 0, 255]), 27, -1,   3692, -500) ]  # active power, W
+
+LATENCY_RECORDS = 65536 # send times kept for latency measurement
+WRITE_TIMEOUT   = 1.0   # seconds a telegram may take to be written before it is skipped
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+class SML_Meter:
+  """
+  @brief   SML_Meter class.
+           A virtual meter creating telegrams of a SML_PublicOpenRes, a SML_GetListRes and a SML_PublicCloseRes message
+           like a real meter. The first telegram is built by the pySML encoder; for the following ones the changed
+           values are written into it by SML_Telegram.edit.
+  """
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __init__(self, ServerId, Values=None, Seed=None):
+    """
+    @brief   Constructor.
+    @param   ServerId   The server ID of the meter (bytes).
+    @param   Values     List of tuples (OBIS code, unit, scaler, initial value, increment) of the value entries, see
+                        DEFAULT_VALUES; None means DEFAULT_VALUES.
+    @param   Seed       Seed of the random generator varying the values.
+    """
+    if ( not isinstance(ServerId, (bytes, bytearray)) ): raise SMLException("Argument 'ServerId' is not of type 'bytes' or 'bytearray'.")
+    self._sid = bytes(ServerId)
+    self._val = list(DEFAULT_VALUES if ( Values == None ) else Values)
+    self._rnd = random.Random(Seed)
+    self._cnt = 0
+    self._beg = time.time()
+    self._tlg = None
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _mssg(self, Tag, Body):
+    """
+    @brief   Build a SML_Message around a message body.
+    @param   Tag    The SML_MessageBody tag of 'Body'.
+    @param   Body   The message body.
+    @return  The SML_Message including its CRC.
+    """
+    vMsg = SML_Message()
+    vMsg.TransactionId.valu = bytearray(self.getTransactionId(0))
+    vMsg.GroupNo.valu       = 0
+    vMsg.AbortOnError.valu  = 0
+    vMsg.MessageBody.setElement(Body, Tag)
+    vMsg.Crc.valu           = 0
+    vMsg.Crc.valu           = vMsg.crc(vMsg.data[:-4])
+    return vMsg
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _build(self):
+    """
+    @brief   Build the first telegram by the pySML encoder and decode it again, so it can be edited.
+    """
+    vOpn = SML_PublicOpenRes()
+    vOpn.ServerId.valu = bytearray(self._sid)
+    vLst = SML_GetListRes()
+    vLst.ServerId.valu = bytearray(self._sid)
+    vLst.ActSensorTime.setElement(SML_UnsignedInteger32(0), 0x01)
+    vEnt = []
+    for vObs,vUnt,vScl,vIni,vInc in self._val:
+      e = SML_ValueEntry()
+      e.ObjName.valu = bytearray(vObs)
+      e.Unit.valu    = vUnt
+      e.Scaler.valu  = vScl
+      e.Value.setElement(SML_SignedInteger64(vIni))
+      vEnt.append(e)
+    vLst.ValList.setValu(vEnt)
+    vTlg = SML_Telegram()
+    vTlg.getMssg().extend([self._mssg(0x0101, vOpn), self._mssg(0x0701, vLst), self._mssg(0x0201, SML_PublicCloseRes())])
+    self._tlg = SML_Telegram()
+    self._tlg.data = vTlg.getData()
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getTransactionId(self, Index):
+    """
+    @brief   Getter method returning the TransactionId of a SML_Message of the current telegram.
+    @param   Index   Index of the SML_Message in the telegram.
+    @return  The TransactionId (bytes).
+    """
+    return struct.pack(">IB", self._cnt & 0xFFFFFFFF, Index)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getTelegram(self):
+    """
+    @brief   Getter method returning the next telegram.
+    @return  The telegram (bytes); the TransactionId of its first SML_Message identifies it, see getTransactionId.
+    """
+    if ( self._tlg == None ): self._build()
+    else                    : self._cnt += 1
+    vMsg = self._tlg.getMssg()
+    vLst = vMsg[1].MessageBody.Element
+    for i,m in enumerate(vMsg): self._tlg.edit(m.TransactionId, bytearray(self.getTransactionId(i)))
+    vDat = self._tlg.edit(vLst.ActSensorTime.Element, int(time.time() - self._beg) & 0xFFFFFFFF)
+    for e,(vObs,vUnt,vScl,vIni,vInc) in zip(vLst.ValList.valu, self._val):
+      if   ( vInc > 0 ): vDat = self._tlg.edit(e.Value.Element, vIni + self._cnt*vInc)
+      elif ( vInc < 0 ): vDat = self._tlg.edit(e.Value.Element, vIni + self._rnd.randint(vInc, -vInc))
+    return bytes(vDat)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getServerId(self):
+    """
+    @brief   Getter method returning the server ID of the meter.
+    @return  The server ID (bytes).
+    """
+    return self._sid
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  serverId = property(getServerId)
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+class SML_Simulator:
+  """
+  @brief   SML_Simulator class.
+           Serves the telegrams of N virtual meters, each on a local TCP port or pty, by one thread per meter. The
+           telegrams can be sent with jitter, corrupted and fragmented into several writes. The send time of every
+           telegram is recorded, so clients in the same process can measure their latency by getLatency.
+  """
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __init__(self, Meters=1, Rate=1.0, Jitter=0.0, Corrupt=0.0, Fragment=0, Transport="tcp", Host="127.0.0.1", Values=None, Seed=None):
+    """
+    @brief   Constructor.
+    @param   Meters      Number of virtual meters.
+    @param   Rate        Telegrams per second of each meter.
+    @param   Jitter      Fraction of the period by which each send time randomly varies (0.0 to 1.0).
+    @param   Corrupt     Probability of a telegram having one byte changed, so its CRC check fails.
+    @param   Fragment    Maximum number of bytes per write; 0 means each telegram is written at once.
+    @param   Transport   "tcp" for a listening TCP socket per meter or "pty" for a pseudo terminal per meter.
+    @param   Host        Address the TCP sockets listen on.
+    @param   Values      Value entries of the meters, see SML_Meter.
+    @param   Seed        Seed of the random generators; None means random.
+    """
+    if ( Transport not in ["tcp", "pty"]   ): raise SMLException("Argument 'Transport' is not 'tcp' or 'pty'.")
+    if ( not (0.0 <= Jitter  <= 1.0)       ): raise SMLException("Argument 'Jitter' is not within 0.0 and 1.0.")
+    if ( not (0.0 <= Corrupt <= 1.0)       ): raise SMLException("Argument 'Corrupt' is not within 0.0 and 1.0.")
+    if ( not (isinstance(Rate, (int, float)) and Rate > 0) ): raise SMLException("Argument 'Rate' is not a positive number.")
+    vRnd       = random.Random(Seed)
+    self._mtrs = [SML_Meter(b"SIM" + struct.pack(">I", i), Values, vRnd.random()) for i in range(Meters)]
+    self._rate = Rate
+    self._jit  = Jitter
+    self._cor  = Corrupt
+    self._frg  = Fragment
+    self._trn  = Transport
+    self._host = Host
+    self._seed = vRnd.random()
+    self._stop = threading.Event()
+    self._thrd = []
+    self._endp = []
+    self._fds  = []
+    self._lock = threading.Lock()
+    self._sent = collections.OrderedDict() # (server ID, TransactionId) -> time.perf_counter() after the last write
+    self._cnt  = {"sent":0, "corrupted":0, "bytes":0, "skipped":0}
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def start(self):
+    """
+    @brief   Open the endpoints and start sending.
+    @return  The endpoints, see getEndpoints.
+    """
+    for i,m in enumerate(self._mtrs):
+      if ( self._trn == "tcp" ):
+        vSrv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        vSrv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        vSrv.bind((self._host, 0))
+        vSrv.listen(1)
+        vSrv.settimeout(0.1)
+        self._endp.append(vSrv.getsockname())
+        self._fds.append(vSrv)
+        vArg = (m, vSrv, None, i)
+      else:
+        import tty
+        vMst,vSlv = os.openpty()
+        tty.setraw(vSlv) # no line discipline processing of the binary data
+        os.set_blocking(vMst, False)
+        self._endp.append(os.ttyname(vSlv))
+        self._fds.extend([vMst, vSlv])
+        vArg = (m, None, vMst, i)
+      self._thrd.append(threading.Thread(target=self._serve, args=vArg, daemon=True))
+    for t in self._thrd: t.start()
+    return self._endp
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def stop(self):
+    """
+    @brief   Stop sending and close the endpoints.
+    """
+    self._stop.set()
+    for t in self._thrd: t.join()
+    for f in self._fds:
+      if ( isinstance(f, socket.socket) ): f.close()
+      else                               : os.close(f)
+    self._thrd = []
+    self._fds  = []
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _serve(self, Meter, Server, Fd, Index):
+    """
+    @brief   Sender thread of one meter.
+    @param   Meter    The SML_Meter.
+    @param   Server   The listening socket for "tcp", otherwise None.
+    @param   Fd       The pty master file descriptor for "pty", otherwise None.
+    @param   Index    Index of the meter, used to seed its random generator.
+    """
+    vRnd = random.Random(self._seed + Index)
+    vPer = 1.0 / self._rate
+    vCon = None
+    vDue = time.perf_counter() + vRnd.random()*vPer # spread the meters over the first period
+    while ( not self._stop.is_set() ):
+      if ( (Server != None) and (vCon == None) ):
+        try:
+          vCon,vAdr = Server.accept()
+          vCon.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+          vCon.setblocking(False)
+        except socket.timeout:
+          continue
+      vDly = vDue - time.perf_counter()
+      if ( vDly > 0 ):
+        self._stop.wait(vDly)
+        continue
+      vDue = vDue + vPer * (1.0 + self._jit*(2*vRnd.random()-1))
+      vTlg = Meter.getTelegram()
+      vCor = vRnd.random() < self._cor
+      if ( vCor ):
+        vTlg = bytearray(vTlg)
+        vTlg[vRnd.randrange(8, len(vTlg)-8)] ^= 1 << vRnd.randrange(8)
+      try:
+        vPos = 0
+        vDdl = time.perf_counter() + WRITE_TIMEOUT
+        while ( vPos < len(vTlg) ):
+          vLen = len(vTlg) - vPos if ( self._frg <= 0 ) else vRnd.randint(1, self._frg)
+          self._write(vCon, Fd, vTlg[vPos:(vPos+vLen)], vDdl)
+          vPos = vPos + vLen
+      except OSError: # includes the TimeoutError of a client not reading; a TCP client is dropped, it may reconnect
+        if ( vCon != None ): vCon.close()
+        vCon = None
+        with self._lock: self._cnt["skipped"] += 1
+        continue
+      vNow = time.perf_counter()
+      with self._lock:
+        self._sent[(Meter.serverId, Meter.getTransactionId(0))] = vNow
+        if ( len(self._sent) > LATENCY_RECORDS ): self._sent.popitem(last=False)
+        self._cnt["sent"]      += 1
+        self._cnt["corrupted"] += vCor
+        self._cnt["bytes"]     += len(vTlg)
+    if ( vCon != None ): vCon.close()
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _write(self, Con, Fd, Data, Deadline):
+    """
+    @brief   Write to a non-blocking socket or pty master, waiting for free buffer space at most until 'Deadline' and
+             never longer than until stop is called.
+    @param   Con        The connected socket for "tcp", otherwise None.
+    @param   Fd         The pty master file descriptor for "pty", otherwise None.
+    @param   Data       The bytes to write.
+    @param   Deadline   time.perf_counter() the write has to be completed by.
+    """
+    vPos = 0
+    while ( vPos < len(Data) ):
+      try:
+        if ( Con != None ): vPos = vPos + Con.send(Data[vPos:])
+        else              : vPos = vPos + os.write(Fd, Data[vPos:])
+      except BlockingIOError:
+        vTmo = min(0.1, Deadline - time.perf_counter()) # returns in time for stop
+        if ( (vTmo <= 0) or self._stop.is_set() ): raise TimeoutError("Telegram not written within the write timeout.")
+        select.select([], [Fd if ( Con == None ) else Con], [], vTmo)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getLatency(self, ServerId, TransactionId, Now=None):
+    """
+    @brief   Getter method returning the time since a telegram was completely sent.
+    @param   ServerId        The server ID of the meter.
+    @param   TransactionId   The TransactionId of the first SML_Message of the telegram.
+    @param   Now             time.perf_counter() of reception; None means now.
+    @return  The latency in seconds or None if the telegram is unknown.
+    """
+    vNow = time.perf_counter() if ( Now == None ) else Now
+    with self._lock:
+      vSnt = self._sent.get((bytes(ServerId), bytes(TransactionId)))
+    return None if ( vSnt == None ) else vNow - vSnt
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getEndpoints(self):
+    """
+    @brief   Getter method returning the endpoints of the meters.
+    @return  A list of (host, port) tuples for "tcp" or of pty device paths for "pty".
+    """
+    return list(self._endp)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getStats(self):
+    """
+    @brief   Getter method returning the counters.
+    @return  A dict of the number of telegrams 'sent', 'corrupted' and 'skipped' (write failed or not completed within
+             WRITE_TIMEOUT), and of sent 'bytes'.
+    """
+    with self._lock:
+      return dict(self._cnt)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  endpoints = property(getEndpoints)
+  stats     = property(getStats)
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+def measure(Simulator, Duration, Decoder=None):
+  """
+  @brief   Read all endpoints of a running SML_Simulator by a SML_Reader, which frames and decodes the telegrams, and
+           measure its end-to-end latency and throughput.
+  @param   Simulator   The started SML_Simulator.
+  @param   Duration    Number of seconds to measure.
+  @param   Decoder     The SML_Decoder of the client; None means a default SML_Decoder.
+  @return  A dict of the number of 'decoded', 'crc_failed' and 'failed' telegrams, the decoded telegrams per second
+           ('throughput') and the latency in seconds from the last byte sent until decoded ('latency_min',
+           'latency_mean', 'latency_p50', 'latency_p99', 'latency_max').
+  """
+  from .reader import SML_Reader
+  vLat = []
+  def handle(Name, Telegram):
+    vNow = time.perf_counter()
+    vMsg = Telegram.getMssg()[0]
+    vVal = Simulator.getLatency(vMsg.MessageBody.Element.ServerId.valu, vMsg.TransactionId.valu, vNow)
+    if ( vVal != None ): vLat.append(vVal)
+  vRdr = SML_Reader(handle, Decoder=SML_Decoder() if ( Decoder == None ) else Decoder, BufferSize=65536)
+  vBeg = time.perf_counter()
+  try:
+    for e in Simulator.endpoints: vRdr.add(e)
+    vRdr.run(Duration)
+  finally:
+    vTme = time.perf_counter() - vBeg
+    vSta = vRdr.close()
+  vRes = {"decoded":vSta["telegrams"], "crc_failed":vSta["crc_failed"], "failed":vSta["failed"]}
+  vLat.sort()
+  vRes["throughput"] = vRes["decoded"] / vTme
+  for k,q in [("latency_min", 0.0), ("latency_p50", 0.5), ("latency_p99", 0.99), ("latency_max", 1.0)]:
+    vRes[k] = vLat[min(int(q*len(vLat)), len(vLat)-1)] if ( vLat ) else None
+  vRes["latency_mean"] = (sum(vLat) / len(vLat)) if ( vLat ) else None
+  return vRes
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def main(Argv=None):
+  """
+  @brief   Command line entry point serving virtual meters and optionally measuring a local client.
+  @param   Argv   List of command line arguments; None means sys.argv.
+  @return  The exit status.
+  """
+  import argparse
+  vPrs = argparse.ArgumentParser(prog="python -m pySML.simulator", description="Serve SML telegrams of virtual meters.")
+  vPrs.add_argument("-n", "--meters",    type=int,   default=1,     help="number of virtual meters (default: 1)")
+  vPrs.add_argument("-r", "--rate",      type=float, default=1.0,   help="telegrams per second per meter (default: 1)")
+  vPrs.add_argument("--jitter",          type=float, default=0.0,   help="fraction of the period the send times vary by (default: 0)")
+  vPrs.add_argument("--corrupt",         type=float, default=0.0,   help="probability of a corrupted telegram (default: 0)")
+  vPrs.add_argument("--fragment",        type=int,   default=0,     help="maximum bytes per write; 0 writes telegrams at once (default: 0)")
+  vPrs.add_argument("-t", "--transport", default="tcp", choices=["tcp", "pty"], help="endpoint type (default: tcp)")
+  vPrs.add_argument("--measure",         type=float, default=0.0,   help="measure a local client for this many seconds, then exit")
+  vPrs.add_argument("--compiled",        action="store_true",       help="measure with SML_Decoder(Compiled=True)")
+  vArg = vPrs.parse_args(Argv)
+
+  vSim = SML_Simulator(vArg.meters, vArg.rate, vArg.jitter, vArg.corrupt, vArg.fragment, vArg.transport)
+  for e in vSim.start():
+    print("{}:{}".format(*e) if ( isinstance(e, tuple) ) else e, flush=True)
+  try:
+    if ( vArg.measure > 0 ):
+      vRes = measure(vSim, vArg.measure, SML_Decoder(Compiled=vArg.compiled))
+      for k,v in vRes.items():
+        print("{:<13}: {}".format(k, v if ( (v == None) or not k.startswith("latency") ) else "{:.3f} ms".format(1000*v)))
+      print("{:<13}: {}".format("sent", vSim.stats["sent"]))
+    else:
+      while True: time.sleep(3600)
+  except KeyboardInterrupt:
+    pass
+  finally:
+    vSim.stop()
+  return 0
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+if ( __name__ == '__main__' ):
+  import sys
+  sys.exit(main())
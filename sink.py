@@ -0,0 +1,383 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import os
+import queue
+import threading
+import time
+
+from . import READING_COLUMNS, SMLException
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+COLUMNS = ["time"] + READING_COLUMNS
+
+_CLOSE  = object() # queue item ending the writer thread
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+def readings(Telegram, Time):
+  """
+  @brief   Itemize the value entries of a SML_Telegram.
+  @param   Telegram   The decoded SML_Telegram.
+  @param   Time       Reception time of the telegram in seconds since the epoch.
+  @return  A list of readings, each a tuple of the values named by COLUMNS, see SML_Telegram.readings.
+  """
+  return [(Time,) + r for r in Telegram.readings]
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+class SML_Sink:
+  """
+  @brief   SML_Sink class.
+           Base class of the sinks. put hands a decoded SML_Telegram to a bounded queue and never waits; a writer
+           thread takes the telegrams from there and writes their items in batches. A batch is written once it holds
+           'FlushSize' items or its oldest item is 'FlushInterval' seconds old. If the queue is full the telegram is
+           dropped and counted. Derived classes implement _open, _items, _write and _close, all called by the writer
+           thread only.
+  """
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __init__(self, FlushSize=1000, FlushInterval=1.0, MaxQueue=10000):
+    """
+    @brief   Constructor starting the writer thread.
+    @param   FlushSize       Number of items written at once.
+    @param   FlushInterval   Maximum number of seconds an item waits for its batch to be written.
+    @param   MaxQueue        Maximum number of SML_Telegrams waiting in the queue.
+    """
+    if ( not isinstance(FlushSize, int) or (FlushSize < 1)                  ): raise SMLException("Argument 'FlushSize' is not of type 'int' or less than 1.")
+    if ( not (isinstance(FlushInterval, (int, float)) and FlushInterval > 0) ): raise SMLException("Argument 'FlushInterval' is not a positive number.")
+    if ( not isinstance(MaxQueue, int) or (MaxQueue < 1)                    ): raise SMLException("Argument 'MaxQueue' is not of type 'int' or less than 1.")
+    self._fsiz = FlushSize
+    self._fint = FlushInterval
+    self._que  = queue.Queue(MaxQueue)
+    self._lock = threading.Lock()
+    self._cnt  = {"put":0, "dropped":0, "written":0, "batches":0, "failed":0}
+    self._err  = None
+    self._done = 0 # items of the current batch already stored, counted by _write
+    self._thrd = threading.Thread(target=self._run, daemon=True)
+    self._thrd.start()
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *Args):
+    self.close()
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def put(self, Telegram, Time=None):
+    """
+    @brief   Queue a decoded SML_Telegram without waiting. It must not be changed afterwards.
+    @param   Telegram   The decoded SML_Telegram.
+    @param   Time       Reception time in seconds since the epoch; None means now.
+    @return  True if the telegram was queued, False if it was dropped because the queue is full.
+    """
+    vTim = time.time() if ( Time == None ) else Time
+    try:
+      self._que.put_nowait((Telegram, vTim))
+    except queue.Full:
+      with self._lock: self._cnt["dropped"] += 1
+      return False
+    with self._lock: self._cnt["put"] += 1
+    return True
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _run(self):
+    """
+    @brief   Writer thread: collect the items of the queued telegrams and write them in batches.
+    """
+    try:
+      self._open()
+    except Exception as e:
+      self._fail(0, e) # the queue fills up and further telegrams are dropped
+      return
+    vBat = []
+    vDue = None # time the current batch has to be written at
+    vEnd = False
+    while ( not vEnd ):
+      try:
+        vItm = self._que.get(timeout=None if ( vDue == None ) else max(0.0, vDue - time.monotonic()))
+      except queue.Empty:
+        vItm = None
+      if   ( vItm is _CLOSE ):
+        vEnd = True
+      elif ( vItm != None   ):
+        if ( vDue == None ): vDue = time.monotonic() + self._fint
+        try:
+          vBat.extend(self._items(*vItm))
+        except Exception as e:
+          self._fail(1, e)
+      if ( vBat and (vEnd or (len(vBat) >= self._fsiz) or (time.monotonic() >= vDue)) ):
+        self._flush(vBat)
+        vBat = []
+      if ( not vBat ): vDue = None
+    self._close()
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _flush(self, Items):
+    """
+    @brief   Write a batch of items and count the result; if _write fails, the items it already stored are counted as
+             written and only the others as failed.
+    @param   Items   List of items returned by _items.
+    """
+    self._done = 0
+    try:
+      self._write(Items)
+    except Exception as e:
+      with self._lock: self._cnt["written"] += self._done
+      self._fail(len(Items) - self._done, e)
+      return
+    with self._lock:
+      self._cnt["written"] += len(Items)
+      self._cnt["batches"] += 1
+
+  def _fail(self, Number, Error):
+    """
+    @brief   Count items that failed to be itemized or written and keep the exception, see getError.
+    @param   Number   Number of failed items.
+    @param   Error    The exception raised.
+    """
+    with self._lock:
+      self._cnt["failed"] += Number
+      self._err = Error
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _open(self):
+    """
+    @brief   Open the storage; called once by the writer thread before the first batch.
+    """
+    pass
+
+  def _items(self, Telegram, Time):
+    """
+    @brief   Itemize a queued SML_Telegram.
+    @param   Telegram   The decoded SML_Telegram.
+    @param   Time       Reception time of the telegram in seconds since the epoch.
+    @return  A list of items to write.
+    """
+    return readings(Telegram, Time)
+
+  def _write(self, Items):
+    """
+    @brief   Write a batch of items. Implementations storing the items one by one add each stored item to '_done', so a
+             failure does not count the items stored before as failed.
+    @param   Items   List of items returned by _items.
+    """
+    raise NotImplementedError
+
+  def _close(self):
+    """
+    @brief   Close the storage; called once by the writer thread after the last batch.
+    """
+    pass
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def close(self):
+    """
+    @brief   Write all queued telegrams, close the storage and end the writer thread.
+    @return  The counters, see getStats.
+    """
+    if ( self._thrd.is_alive() ):
+      self._que.put(_CLOSE) # waits for free space, so no queued telegram gets lost
+      self._thrd.join()
+    return self.stats
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getStats(self):
+    """
+    @brief   Getter method returning the counters.
+    @return  A dict of the number of telegrams 'put' into the queue, 'dropped' because it was full and 'pending' in it,
+             and of the items 'written', the 'batches' they were written in and the items 'failed' to be itemized
+             or written.
+    """
+    with self._lock:
+      vRes = dict(self._cnt)
+    vRes["pending"] = self._que.qsize()
+    return vRes
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def getError(self):
+    """
+    @brief   Getter method returning the exception of the last failed item or batch.
+    @return  The exception or None.
+    """
+    return self._err
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  error = property(getError)
+  stats = property(getStats)
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+class SML_SqliteSink(SML_Sink):
+  """
+  @brief   SML_SqliteSink class.
+           Writes the readings of the SML_Telegrams into a SQLite table, one transaction and one executemany per batch.
+  """
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __init__(self, Path, Table="readings", FlushSize=1000, FlushInterval=1.0, MaxQueue=10000):
+    """
+    @brief   Constructor.
+    @param   Path            Path of the database file; the table is created if it does not exist.
+    @param   Table           Name of the table, with the columns named by COLUMNS.
+    @param   FlushSize       See SML_Sink.
+    @param   FlushInterval   See SML_Sink.
+    @param   MaxQueue        See SML_Sink.
+    """
+    if ( not (isinstance(Table, str) and Table.isidentifier()) ): raise SMLException("Argument 'Table' is not a valid identifier.")
+    self._path = Path
+    self._tabl = Table
+    self._con  = None
+    self._sql  = "INSERT INTO {} ({}) VALUES ({})".format(Table, ", ".join(COLUMNS), ", ".join("?"*len(COLUMNS)))
+    SML_Sink.__init__(self, FlushSize, FlushInterval, MaxQueue)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _open(self):
+    """
+    @brief   Connect to the database and create the table.
+    """
+    import sqlite3
+    self._con = sqlite3.connect(self._path) # a connection may only be used by the thread creating it
+    with self._con:
+      self._con.execute("CREATE TABLE IF NOT EXISTS {} (time REAL, server TEXT, obis TEXT, unit INTEGER, scaler INTEGER, raw, value)".format(self._tabl))
+
+  def _items(self, Telegram, Time):
+    """
+    @brief   Itemize a queued SML_Telegram into readings, with integers beyond the 64 bit of SQLite as decimal string.
+    @param   Telegram   The decoded SML_Telegram.
+    @param   Time       Reception time of the telegram in seconds since the epoch.
+    @return  A list of readings.
+    """
+    return [tuple(str(v) if ( isinstance(v, int) and not (-(1<<63) <= v < (1<<63)) ) else v for v in r) for r in readings(Telegram, Time)]
+
+  def _write(self, Items):
+    """
+    @brief   Insert a batch of readings in one transaction.
+    @param   Items   List of readings.
+    """
+    with self._con:
+      self._con.executemany(self._sql, Items)
+
+  def _close(self):
+    """
+    @brief   Close the database connection.
+    """
+    self._con.close()
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+class SML_FileSink(SML_Sink):
+  """
+  @brief   SML_FileSink class.
+           Appends to a file that is rotated once it reaches 'MaxBytes', so it exceeds it by at most one item: 'Path'
+           is renamed to 'Path.1', 'Path.1' to 'Path.2' and so on, up to 'Backups' files. The format "csv" writes the
+           readings of the SML_Telegrams with a header line of COLUMNS; the format "binary" writes the bytes the
+           SML_Telegrams were decoded from, including the SML_Messages skipped by 'MessageTypes', so the files can be
+           read like a capture file, e.g. by 'python -m pySML'.
+  """
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def __init__(self, Path, Format="csv", MaxBytes=1<<24, Backups=5, FlushSize=1000, FlushInterval=1.0, MaxQueue=10000):
+    """
+    @brief   Constructor.
+    @param   Path            Path of the file.
+    @param   Format          "csv" or "binary".
+    @param   MaxBytes        Size a file is rotated at; 0 means it is never rotated.
+    @param   Backups         Number of rotated files kept.
+    @param   FlushSize       See SML_Sink.
+    @param   FlushInterval   See SML_Sink.
+    @param   MaxQueue        See SML_Sink.
+    """
+    if ( Format not in ["csv", "binary"]                ): raise SMLException("Argument 'Format' is not 'csv' or 'binary'.")
+    if ( not isinstance(MaxBytes, int) or (MaxBytes < 0) ): raise SMLException("Argument 'MaxBytes' is not of type 'int' or less than 0.")
+    if ( not isinstance(Backups, int) or (Backups < 1)   ): raise SMLException("Argument 'Backups' is not of type 'int' or less than 1.")
+    self._path = Path
+    self._fmt  = Format
+    self._max  = MaxBytes
+    self._bak  = Backups
+    self._fil  = None
+    self._csv  = None
+    self._siz  = 0 # bytes in the file
+    SML_Sink.__init__(self, FlushSize, FlushInterval, MaxQueue)
+
+  #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+  def _open(self):
+    """
+    @brief   Open the file for appending; a new CSV file starts with the header line.
+    """
+    if ( self._fmt == "csv" ):
+      import csv
+      self._fil = open(self._path, "a", newline="", encoding="ascii") # hex strings, OBIS codes and numbers only, so characters are bytes
+      self._csv = csv.writer(self._fil, lineterminator="\n")
+      self._siz = self._fil.tell()
+      if ( self._siz == 0 ): self._siz += self._csv.writerow(COLUMNS)
+    else:
+      self._fil = open(self._path, "ab")
+      self._siz = self._fil.tell()
+
+  def _items(self, Telegram, Time):
+    """
+    @brief   Itemize a queued SML_Telegram into readings for "csv" or into its received bytes for "binary"; a
+             SML_Telegram not decoded from bytes is encoded.
+    @param   Telegram   The decoded SML_Telegram.
+    @param   Time       Reception time of the telegram in seconds since the epoch.
+    @return  A list of items to write.
+    """
+    if   ( self._fmt == "csv"        ): return readings(Telegram, Time)
+    elif ( Telegram.received != None ): return [Telegram.received]
+    else                              : return [Telegram.data]
+
+  def _write(self, Items):
+    """
+    @brief   Append a batch of items. The size is checked after each item, so the file is rotated within the batch and
+             exceeds 'MaxBytes' by at most one item.
+    @param   Items   List of readings or telegrams.
+    """
+    for e in Items:
+      if ( self._fmt == "csv" ): self._siz += self._csv.writerow(e)
+      else                     : self._siz += self._fil.write(e)
+      self._done += 1
+      if ( self._max and (self._siz >= self._max) ): self._rotate()
+    self._fil.flush()
+
+  def _rotate(self):
+    """
+    @brief   Rename the full file and its backups and open a new file.
+    """
+    self._fil.close()
+    for i in range(self._bak-1, 0, -1):
+      if ( os.path.exists("{}.{}".format(self._path, i)) ): os.replace("{}.{}".format(self._path, i), "{}.{}".format(self._path, i+1))
+    os.replace(self._path, self._path + ".1")
+    self._open()
+
+  def _close(self):
+    """
+    @brief   Close the file.
+    """
+    self._fil.close()
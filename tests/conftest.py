@@ -0,0 +1,99 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _importPath():
+  """
+  @brief   Determine a directory from which the checkout can be imported as package 'pySML'.
+  @return  The parent directory of a checkout named 'pySML', otherwise a temporary directory with a link named 'pySML'
+           to the checkout.
+  """
+  if ( os.path.basename(ROOT) == "pySML" ): return os.path.dirname(ROOT)
+  vDir = tempfile.mkdtemp(prefix="pySML-tests-")
+  atexit.register(shutil.rmtree, vDir, True)
+  os.symlink(ROOT, os.path.join(vDir, "pySML"), target_is_directory=True)
+  return vDir
+
+IMPORT_PATH = _importPath()
+sys.path.insert(0, IMPORT_PATH)
+os.environ["PYTHONPATH"] = os.pathsep.join([IMPORT_PATH] + ([os.environ["PYTHONPATH"]] if os.environ.get("PYTHONPATH") else [])) # for subprocesses
+
+import pySML
+
+# the telegram of the README example: SML_PublicOpenRes, SML_GetListRes with 11 value entries, SML_PublicCloseRes
+SAMPLE = bytes.fromhex(
+  "1b1b1b1b01010101"
+  "7607001404821729620062007263010176010107001401d4b26309454d485858585858010163ae7400"
+  "760700140482172a6200620072630701770109454d485858585858070100620affff7262016501d45c837b77078181c78203ff0101010104"
+  "454d480177070100000000ff010101010f01454d48303030585858585858580177070100000009ff010101010b0901454d4800004f1bde01"
+  "77070100010800ff6400018201621e52ff5600022e4abe0177070100010801ff0101621e52ff5600022e485b0177070100010802ff0101"
+  "621e52ff5600000002630177070100100700ff0101621b52ff5500000e6c0177070100240700ff0101621b52ff550000056c0177070100"
+  "380700ff0101621b52ff550000072801770701004c0700ff0101621b52ff55000001d80177078181c78205ff017262016501d45c830101"
+  "8302000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000010101"
+  "63bcd700"
+  "760700140482172b6200620072630201710163b99d0000"
+  "1b1b1b1b1a017329"
+)
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+@pytest.fixture
+def sample():
+  """
+  @brief   The telegram of the README example.
+  @return  A new bytearray of the telegram.
+  """
+  return bytearray(SAMPLE)
+
+@pytest.fixture
+def corrupted():
+  """
+  @brief   The telegram of the README example with a changed byte, so its telegram CRC check fails.
+  @return  A new bytearray of the telegram.
+  """
+  vRes = bytearray(SAMPLE)
+  vRes[100] ^= 0x01
+  return vRes
+
+@pytest.fixture
+def malformed():
+  """
+  @brief   The telegram of the README example with a shortened 'ObjName' of the first value entry, but a correct
+           telegram CRC. The following fields shift, so that a sequence appears where the implicit SML_Value choice
+           only allows scalars; decoding it raises a SMLException caused by a TypeError.
+  @return  A new bytearray of the telegram.
+  """
+  vRes      = bytearray(SAMPLE)
+  vRes[93]  = 0x06
+  vRes[-2:] = pySML.SML_Telegram().crc(vRes[:-2], Int=False)
+  return vRes
@@ -0,0 +1,154 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import random
+
+import pytest
+
+import pySML
+from pySML.compiler  import SML_Compiler
+from pySML.simulator import SML_Meter
+
+from conftest import SAMPLE
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+CORPUS_SEED   = 1
+CORPUS_EDITED = 100 # telegrams with values of other lengths
+CORPUS_BROKEN = 400 # telegrams with changed bytes but correct telegram CRC
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _leaves(Node, Res):
+  """
+  @brief   Collect the octet strings and integers below a SML object.
+  @param   Node   The SML object.
+  @param   Res    List the leaves are appended to.
+  """
+  if   ( isinstance(Node, (pySML.SML_OctetString, pySML.SML_Integer)) ): Res.append(Node)
+  elif ( isinstance(Node, pySML.SML_Choice)                          ):
+    if ( Node.Element != None ): _leaves(Node.Element, Res)
+  elif ( isinstance(Node, pySML.SML_Sequence) and Node.valu          ):
+    for e in Node.valu: _leaves(e, Res)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _corpus():
+  """
+  @brief   Build the corpus: the README sample and simulated telegrams, variants of them with randomly edited values of
+           other lengths and variants with randomly changed bytes, whose telegram CRC is corrected so that the messages
+           are decoded.
+  @return  A list of telegrams (bytes).
+  """
+  vRnd = random.Random(CORPUS_SEED)
+  vMtr = SML_Meter(b"TEST0001", Seed=CORPUS_SEED)
+  vRes = [SAMPLE] + [bytes(vMtr.getTelegram()) for i in range(3)]
+  vDec = pySML.SML_Decoder()
+  for i in range(CORPUS_EDITED):
+    vDat = bytearray(vRnd.choice(vRes[:4]))
+    vTlg = vDec.decode(vDat)
+    vLvs = []
+    for m in vTlg.getMssg(): _leaves(m.MessageBody, vLvs)
+    for k in range(3):
+      vLvs = [l for l in vLvs if ( l.valu != None )]
+      vLeaf = vRnd.choice(vLvs)
+      try:
+        if ( isinstance(vLeaf, pySML.SML_OctetString) ): vDat = vTlg.edit(vLeaf, bytearray(vRnd.randbytes(vRnd.randint(0, 12))))
+        elif ( vLeaf._nbytes                          ): vDat = vTlg.edit(vLeaf, vRnd.randint(0, 2**(8*vLeaf._nbytes-1)-1))
+      except pySML.SMLException:
+        pass
+    vRes.append(bytes(vDat))
+  vTlg = pySML.SML_Telegram()
+  for i in range(CORPUS_BROKEN):
+    vDat = bytearray(vRnd.choice(vRes))
+    for k in range(vRnd.randint(1, 3)): vDat[vRnd.randrange(8, len(vDat)-8)] = vRnd.randrange(256)
+    vDat[-2:] = vTlg.crc(vDat[:-2], Int=False)
+    vRes.append(bytes(vDat))
+  return vRes
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _tree(Node):
+  """
+  @brief   Represent a decoded SML object by its type and attributes, without the links to its parent and prototypes.
+  @param   Node   The SML object or any attribute value of it.
+  @return  A comparable representation.
+  """
+  if   ( isinstance(Node, pySML._SML_Base) ): return (type(Node).__name__, {k:_tree(v) for k,v in vars(Node).items() if ( k not in ["_par", "_map", "_objc"] )})
+  elif ( isinstance(Node, list)            ): return [_tree(e) for e in Node]
+  elif ( isinstance(Node, memoryview)      ): return ("memoryview", bytes(Node))
+  else                                      : return (type(Node).__name__, Node)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _decode(Decoder, Data):
+  """
+  @brief   Decode a telegram and represent the result.
+  @param   Decoder   The SML_Decoder.
+  @param   Data      The telegram.
+  @return  A comparable representation of the SML_Telegram or of the raised exception.
+  """
+  try:
+    vTlg = Decoder.decode(bytearray(Data))
+  except Exception as e:
+    return ("exception", type(e).__name__, str(e))
+  return ("telegram", vTlg.getText(), bytes(vTlg.getData()), [_tree(m) for m in vTlg.getMssg()])
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+CORPUS = _corpus()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+@pytest.mark.parametrize("Options", [{}, {"MessageTypes":{0x0701}}, {"Intern":pySML.SML_InternTable()}], ids=["all", "getlist", "intern"])
+def test_compiled_equals_generic(Options):
+  vGen = pySML.SML_Decoder(**Options)
+  vCmp = pySML.SML_Decoder(Compiled=True, **Options)
+  vCnt = {"telegram":0, "exception":0}
+  for d in CORPUS:
+    vRes = _decode(vGen, d)
+    assert _decode(vCmp, d) == vRes, d.hex()
+    vCnt[vRes[0]] += 1
+  assert vCnt["telegram"] > CORPUS_EDITED # the corpus covers both outcomes
+  assert vCnt["exception"] > 0
+
+def test_corpus_raises_sml_exceptions_only():
+  vDec = pySML.SML_Decoder(Compiled=True)
+  for d in CORPUS:
+    try:
+      vDec.decode(bytearray(d))
+    except pySML.SMLException:
+      pass
+
+@pytest.mark.parametrize("Compiled", [False, True], ids=["generic", "compiled"])
+def test_decoded_objects_share_one_copy(Compiled):
+  vTab = pySML.SML_InternTable()
+  vTlg = pySML.SML_Decoder(Compiled=Compiled, Intern=vTab).decode(bytearray(SAMPLE))
+  vLvs = []
+  for m in vTlg.getMssg(): _leaves(m, vLvs)
+  vRaw = {id(l._raw) for l in vLvs}
+  assert len(vRaw) == 1 # interned leaves included, no object keeps a copy of its own
+  assert all(bytes(l.getRaw()) == bytes(l.data) for l in vLvs)
+  assert bytes(vTlg.getData()) == SAMPLE
+  vTlg.getMssg()[1].MessageBody.Element.ServerId.valu = bytearray(b"HelloSML")
+  assert not vTlg.getMssg()[1].isClean()
+  assert bytes(vTlg.getData()) != SAMPLE
+  assert vTlg.getMssg()[1].datalen == len(vTlg.getMssg()[1].data)
+
+def test_compiled_source_is_cached():
+  vCmp = SML_Compiler.getDefault()
+  assert vCmp.getFunc(pySML.SML_Message) is vCmp.getFunc(pySML.SML_Message)
+  assert "def " in vCmp.getSource(pySML.SML_GetListRes)
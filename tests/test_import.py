@@ -0,0 +1,59 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import os
+import subprocess
+import sys
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+IMPORT_BUDGET_US = 10000 # self import time of the pySML modules with their bytecode cached; about 2 ms, the standard
+                         # library modules they import (about 8 ms of enum, functools and collections) are not included
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _import(Cache):
+  """
+  @brief   Import pySML in a new interpreter.
+  @param   Cache   Directory the bytecode cache is written to, so the checkout is left unchanged.
+  @return  A tuple of the self import time of the pySML modules in microseconds, i.e. without the modules they import,
+           and of the names of the loaded modules.
+  """
+  vEnv = dict(os.environ)
+  vEnv.pop("PYTHONDONTWRITEBYTECODE", None)
+  vRes = subprocess.run([sys.executable, "-X", "importtime", "-X", "pycache_prefix={}".format(Cache), "-c",
+                         "import pySML, sys; print(' '.join(sys.modules))"], capture_output=True, text=True, check=True, env=vEnv)
+  vTme = 0
+  for l in vRes.stderr.splitlines(): # "import time: <self> | <cumulative> | <indented name>"
+    vCol = l.split("|")
+    if ( (len(vCol) == 3) and (vCol[2].strip().split(".")[0] == "pySML") ): vTme += int(vCol[0].split(":")[1])
+  return vTme, set(vRes.stdout.split())
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+def test_heavy_modules_are_not_imported(tmp_path):
+  vTme,vMod = _import(tmp_path)
+  assert "pySML" in vMod
+  assert not ({"inspect", "textwrap", "copy"} & vMod)
+
+def test_import_time_budget(tmp_path):
+  _import(tmp_path) # write the bytecode cache, as the helpers of a deployment import a compiled package
+  vTme = min(_import(tmp_path)[0] for i in range(3))
+  assert vTme < IMPORT_BUDGET_US
@@ -0,0 +1,63 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import csv
+import json
+
+import pytest
+
+import pySML
+from pySML.__main__ import main
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+@pytest.fixture
+def capture(tmp_path, sample, corrupted, malformed):
+  """
+  @brief   A capture file of junk bytes, two good telegrams, one failing its CRC and a malformed one.
+  @return  The path of the capture file.
+  """
+  vPth = tmp_path / "capture.bin"
+  vPth.write_bytes(b"junk" + sample + corrupted + malformed + sample)
+  return str(vPth)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+@pytest.mark.parametrize("Options", [[], ["--generic"], ["-j", "2"]])
+def test_csv(capsys, capture, sample, Options):
+  assert main(["-f", "csv", "--stats"] + Options + [capture]) == 0
+  vOut,vErr = capsys.readouterr()
+  vRws = list(csv.reader(vOut.splitlines()))
+  vExp = [["" if ( v == None ) else str(v) for v in r] for r in pySML.SML_Decoder().decode(sample).readings]
+  assert vRws == [pySML.READING_COLUMNS] + vExp*2
+  vSts = dict(l.split(":", 1) for l in vErr.splitlines())
+  assert vSts["telegrams      "] == " 4 (2 decoded)"
+  assert vSts["crc failures   "].startswith(" 1 ")
+  assert vSts["other failures "].startswith(" 1 ")
+  assert vSts["dropped bytes  "] == " 4"
+
+def test_ndjson(capsys, capture, sample):
+  assert main(["-f", "ndjson", capture]) == 0
+  vOut,vErr = capsys.readouterr()
+  vExp = [json.loads(json.dumps(dict(zip(pySML.READING_COLUMNS, r)))) for r in pySML.SML_Decoder().decode(sample).readings]
+  assert [json.loads(l) for l in vOut.splitlines()] == vExp*2
+  assert vErr == ""
+
+def test_missing_file(capsys, tmp_path):
+  assert main(["-f", "csv", str(tmp_path / "missing.bin")]) == 1
+  assert "No such file" in capsys.readouterr()[1]
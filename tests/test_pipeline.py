@@ -0,0 +1,114 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import pytest
+
+import pySML
+from pySML.pipeline import SML_RingBuffer, SML_Pipeline
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+class _FailOnce:
+  """
+  @brief   Handler raising an exception for the first telegram it receives.
+  """
+  def __init__(self):
+    self.calls = 0
+  def __call__(self, Telegram):
+    self.calls += 1
+    if ( self.calls == 1 ): raise RuntimeError("handler failed")
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+@pytest.fixture
+def ring():
+  vRng = SML_RingBuffer(64)
+  yield vRng
+  vRng.close()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def test_ring_wraps_with_marker(ring):
+  # 3 records of 24 bytes: the third does not fit into the 16 bytes left at the end and starts over at the beginning
+  for i in range(2): assert ring.put(bytes([i])*20)
+  assert ring.get(0) == bytearray([0])*20
+  assert ring.put(bytes([2])*20)
+  assert ring.get(0) == bytearray([1])*20
+  assert ring.get(0) == bytearray([2])*20
+  assert ring.get(0) == None
+  assert ring.pending == 0
+
+def test_ring_wraps_without_marker(ring):
+  # a record of 62 bytes leaves less than a length field at the end, so no wrap marker is written
+  assert ring.put(bytes(58))
+  assert ring.get(0) == bytearray(58)
+  assert ring.put(b"next")
+  assert ring.get(0) == bytearray(b"next")
+  assert ring.pending == 0
+
+def test_ring_overflow(ring):
+  assert ring.put(bytes(30))
+  assert not ring.put(bytes(30)) # 2*34 bytes exceed the ring
+  assert ring.put(bytes(26))     # exactly fills it
+  assert not ring.put(b"")
+  assert ring.stats["overflow"] == 2
+  assert ring.stats["put"]      == 2
+  assert ring.get(0) == bytearray(30)
+  assert ring.get(0) == bytearray(26)
+  assert ring.put(bytes(60))     # all space is free again
+  assert ring.get(0) == bytearray(60)
+
+def test_ring_rejects_size():
+  with pytest.raises(pySML.SMLException):
+    SML_RingBuffer(16)
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+@pytest.mark.parametrize("Workers", [1, 2])
+def test_pipeline_captures(tmp_path, sample, corrupted, malformed, Workers):
+  vFl1 = tmp_path / "a.bin"
+  vFl2 = tmp_path / "b.bin"
+  vFl1.write_bytes(b"junk" + sample*50 + corrupted + malformed + sample)
+  vFl2.write_bytes(sample*30)
+  vPpl = SML_Pipeline([str(vFl1), str(vFl2)], Workers=Workers, Options={"Compiled":True})
+  vPpl.start()
+  vSts = vPpl.join(10.0)
+  assert vSts == {"put":83, "overflow":0, "dropped":4, "decoded":81, "crc_failed":1, "failed":1, "handler_failed":0,
+                  "pending":0}
+  assert vPpl.stats == vSts
+
+def test_pipeline_overflow(tmp_path, sample):
+  vFil = tmp_path / "a.bin"
+  vFil.write_bytes(sample*200)
+  vPpl = SML_Pipeline([str(vFil)], Size=1024)
+  vPpl.start()
+  vSts = vPpl.join(10.0)
+  assert vSts["put"] + vSts["overflow"] == 200
+  assert vSts["decoded"] == vSts["put"]
+  assert vSts["pending"] == 0
+
+def test_pipeline_survives_handler(tmp_path, sample):
+  vFil = tmp_path / "a.bin"
+  vFil.write_bytes(sample*30)
+  vPpl = SML_Pipeline([str(vFil)], Handler=_FailOnce())
+  vPpl.start()
+  vSts = vPpl.join(10.0)
+  assert vSts["decoded"] == vSts["put"] == 30
+  assert vSts["handler_failed"] == 1
+  assert vSts["pending"] == 0
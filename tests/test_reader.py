@@ -0,0 +1,130 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import os
+import queue
+import socket
+import tty
+
+import pytest
+
+import pySML
+from pySML.reader import SML_Reader
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+@pytest.fixture
+def pair():
+  """
+  @brief   A connected pair of sockets, the first one to be read by the SML_Reader.
+  @return  A list of both sockets.
+  """
+  vRes = list(socket.socketpair())
+  yield vRes
+  for s in vRes: s.close()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _drain(Reader, Count):
+  """
+  @brief   Poll a SML_Reader until it read a number of telegrams.
+  @param   Reader   The SML_Reader.
+  @param   Count    The number of telegrams to wait for.
+  """
+  vCnt = 0
+  while ( vCnt < Count ):
+    vRes = Reader.poll(5.0)
+    assert vRes or Reader.names, "source removed"
+    vCnt += vRes
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+def test_fragmented_writes_and_junk(pair, sample):
+  vRes = []
+  with SML_Reader(Handler=lambda n, t: vRes.append((n, t)), BufferSize=16) as vRdr:
+    vNam = vRdr.add(pair[0], Name="meter")
+    vDat = b"junk" + sample + b"\x1b\x1b" + sample
+    for i in range(0, len(vDat), 7):
+      pair[1].sendall(vDat[i:(i+7)])
+      vRdr.poll(0.0)
+    _drain(vRdr, 2 - len(vRes))
+    vSts = vRdr.getStats(vNam)
+  assert vRes == [("meter", sample)]*2
+  assert vSts["bytes"] == len(vDat)
+  assert vSts["dropped"] == 6 and vSts["pending"] == 0
+
+def test_failing_telegrams_do_not_stop_other_sources(pair, sample, corrupted, malformed):
+  vRes = []
+  vOth = socket.socketpair()
+  try:
+    with SML_Reader(Handler=lambda n, t: vRes.append(n), Decoder=pySML.SML_Decoder()) as vRdr:
+      vRdr.add(pair[0], Name="bad")
+      vRdr.add(vOth[0], Name="good")
+      pair[1].sendall(corrupted + malformed + sample)
+      vOth[1].sendall(sample)
+      _drain(vRdr, 4)
+      assert vRdr.getStats("bad") ["telegrams"] == 1
+      assert vRdr.getStats("bad") ["crc_failed"] == 1
+      assert vRdr.getStats("bad") ["failed"]     == 1
+      assert vRdr.getStats("good")["telegrams"] == 1
+  finally:
+    for s in vOth: s.close()
+  assert sorted(vRes) == ["bad", "good"]
+
+def test_full_queue_is_not_counted(pair, sample):
+  vQue = queue.Queue(1)
+  with SML_Reader(Queue=vQue) as vRdr:
+    vRdr.add(pair[0], Name="meter")
+    pair[1].sendall(sample*3)
+    _drain(vRdr, 3)
+    vSts = vRdr.stats
+  assert vSts["telegrams"] == 1 and vSts["queue_full"] == 2
+  assert vQue.get_nowait() == ("meter", sample)
+
+def test_eio_of_closed_pty_removes_source(sample):
+  vMst,vSlv = os.openpty()
+  tty.setraw(vSlv)
+  try:
+    with SML_Reader(Handler=lambda n, t: None) as vRdr:
+      vRdr.add(vMst, Name="pty")
+      os.write(vSlv, sample)
+      os.close(vSlv)
+      vSts = vRdr.run(5.0) # returns once the source is removed because of EIO
+      assert vRdr.names == []
+      assert vSts["telegrams"] == 1
+    os.fstat(vMst) # a file descriptor of the caller stays open
+  finally:
+    os.close(vMst)
+
+def test_owned_sources_are_closed(pair):
+  vMst,vSlv = os.openpty()
+  try:
+    vRdr = SML_Reader(Handler=lambda n, t: None)
+    vNam = vRdr.add(os.ttyname(vSlv))
+    vFd  = vRdr._prts[vNam].fd
+    vRdr.add(pair[0])
+    vRdr.close()
+    with pytest.raises(OSError):
+      os.fstat(vFd) # opened by the SML_Reader from the path, so closed by it
+    pair[1].sendall(b"x")
+    assert pair[0].recv(1) == b"x" # the socket of the caller stays open
+  finally:
+    os.close(vSlv)
+    os.close(vMst)
@@ -0,0 +1,48 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import time
+
+import pytest
+
+from pySML.simulator import SML_Simulator, measure
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+@pytest.mark.parametrize("Transport", ["tcp", "pty"])
+def test_measure(Transport):
+  vSim = SML_Simulator(Meters=3, Rate=50, Fragment=16, Transport=Transport, Seed=1)
+  vSim.start()
+  try:
+    vRes = measure(vSim, 1.0)
+  finally:
+    vSim.stop()
+  assert vRes["decoded"] > 0
+  assert vRes["crc_failed"] == vRes["failed"] == 0
+  assert vRes["latency_max"] != None
+
+def test_stop_without_client():
+  vSim = SML_Simulator(Meters=1, Rate=500, Transport="pty", Seed=1)
+  vSim.start()
+  vEnd = time.monotonic() + 10.0
+  while ( (vSim.stats["skipped"] == 0) and (time.monotonic() < vEnd) ): time.sleep(0.1)
+  vBeg = time.monotonic()
+  vSim.stop()
+  assert time.monotonic() - vBeg < 1.0
+  assert vSim.stats["skipped"] > 0 # the pty buffer filled up, so telegrams were skipped instead of blocking
@@ -0,0 +1,92 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import sqlite3
+
+import pytest
+
+import pySML
+from pySML.sink import COLUMNS, SML_FileSink, SML_SqliteSink
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+@pytest.fixture
+def telegram(sample):
+  """
+  @brief   The decoded telegram of the README example.
+  @return  The SML_Telegram.
+  """
+  return pySML.SML_Decoder().decode(sample)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def test_csv_rotates_within_batch(tmp_path, telegram):
+  vPth = tmp_path / "r.csv"
+  vSnk = SML_FileSink(str(vPth), MaxBytes=5000, Backups=100, FlushSize=1000000, FlushInterval=60.0)
+  for i in range(100): vSnk.put(telegram, 0.0)
+  vSts = vSnk.close()
+  assert vSts["batches"] == 1 and vSts["written"] == 100*len(telegram.readings)
+  vFls = sorted(tmp_path.iterdir())
+  vLns = [f.read_text().splitlines() for f in vFls]
+  vRow = max(len(l) + 1 for f in vLns for l in f)
+  assert len(vFls) > 1
+  assert all(f.stat().st_size < 5000 + vRow for f in vFls) # exceeded by at most one row
+  assert all(f[0] == ",".join(COLUMNS) for f in vLns)
+  assert sum(len(f) - 1 for f in vLns) == vSts["written"]
+
+def test_binary_is_a_capture_file(tmp_path, sample, telegram):
+  vPth = tmp_path / "r.bin"
+  vSnk = SML_FileSink(str(vPth), Format="binary", MaxBytes=0, FlushSize=7)
+  for i in range(20): vSnk.put(telegram)
+  assert vSnk.close()["written"] == 20
+  assert pySML.SML_Framer().feed(vPth.read_bytes()) == [sample]*20
+
+def test_binary_keeps_skipped_messages(tmp_path, sample):
+  vPth = tmp_path / "r.bin"
+  vSnk = SML_FileSink(str(vPth), Format="binary")
+  vSnk.put(pySML.SML_Decoder(MessageTypes={0x0701}, Compiled=True).decode(bytearray(sample)))
+  assert vSnk.close()["written"] == 1
+  assert vPth.read_bytes() == sample
+
+def test_failing_write_counts_stored_items(tmp_path, monkeypatch, telegram):
+  def rotate(self): raise OSError("rotate failed")
+  monkeypatch.setattr(SML_FileSink, "_rotate", rotate)
+  vSnk = SML_FileSink(str(tmp_path / "r.bin"), Format="binary", MaxBytes=1000, FlushSize=10)
+  for i in range(10): vSnk.put(telegram)
+  vSts = vSnk.close()
+  assert (vSts["written"], vSts["failed"], vSts["batches"]) == (3, 7, 0) # the third telegram exceeds 'MaxBytes'
+  assert isinstance(vSnk.error, OSError)
+
+def test_sqlite(tmp_path, telegram):
+  vPth = tmp_path / "r.db"
+  vSnk = SML_SqliteSink(str(vPth), FlushSize=25)
+  for i in range(10): vSnk.put(telegram, float(i))
+  assert vSnk.close()["written"] == 10*len(telegram.readings)
+  vCon = sqlite3.connect(str(vPth))
+  try:
+    vRes = vCon.execute("SELECT {} FROM readings WHERE time = 0".format(", ".join(COLUMNS[1:]))).fetchall()
+  finally:
+    vCon.close()
+  assert vRes == telegram.readings
+
+def test_full_queue_drops(tmp_path, telegram):
+  vSnk = SML_SqliteSink(str(tmp_path / "r.db"), MaxQueue=1)
+  vRes = [vSnk.put(telegram) for i in range(1000)]
+  vSts = vSnk.close()
+  assert vSts["dropped"] == vRes.count(False) > 0
+  assert vSts["put"] == vRes.count(True)
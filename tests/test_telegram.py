@@ -0,0 +1,194 @@
+# pySML
+# Copyright (C) 2017  Hallabalooza
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# <http://www.gnu.org/licenses/>.
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+import concurrent.futures
+import random
+
+import pytest
+
+import pySML
+from pySML.simulator import SML_Meter
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+def _crcTable(Data):
+  """
+  @brief   Calculate the CRC16 (X.25) by the table driven algorithm of libsml, as pySML did before binascii.crc_hqx.
+  @param   Data   Byte data list.
+  @return  The CRC as int, with the byte order of SML_Telegram.crc.
+  """
+  vTab = []
+  for i in range(256):
+    vVal = i
+    for k in range(8): vVal = ((vVal >> 1) ^ 0x8408) if ( vVal & 1 ) else (vVal >> 1)
+    vTab.append(vVal)
+  cCrc = 0xFFFF
+  for b in Data:
+    cCrc = (cCrc >> 8) ^ vTab[(cCrc ^ b) & 0xFF]
+  cCrc ^= 0xFFFF
+  return ((cCrc&0xFF)<<8) + ((cCrc&0xFF00)>>8)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _mutables(Node, Res):
+  """
+  @brief   Collect the ids of the mutable objects below a SML object, i.e. the SML objects, lists and bytearrays.
+           The prototypes of a SML_Choice ('_map') and the parent references ('_par') are not followed.
+  @param   Node   The SML object, list or bytearray.
+  @param   Res    Set the ids are added to.
+  """
+  if ( id(Node) in Res ): return
+  if   ( isinstance(Node, bytearray) ): Res.add(id(Node))
+  elif ( isinstance(Node, list)      ):
+    Res.add(id(Node))
+    for e in Node: _mutables(e, Res)
+  elif ( isinstance(Node, pySML._SML_Base) ):
+    Res.add(id(Node))
+    for k,v in vars(Node).items():
+      if ( k not in ("_map", "_par") ): _mutables(v, Res)
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+
+def test_decoder_threads(sample):
+  vTls = [bytes(sample)] + [bytes(SML_Meter(b"TEST%04d" % i, Seed=i).getTelegram()) for i in range(7)]
+  vDec = pySML.SML_Decoder()
+  vDec.decode(bytearray(vTls[0]))
+  vBds = {k:v.getData() for k,v in pySML.SML_MessageBody._bodies.items()}
+  with concurrent.futures.ThreadPoolExecutor(8) as vExe:
+    vRes = list(vExe.map(lambda t: vDec.decode(bytearray(t)), vTls*25))
+  assert [bytes(t.getData()) for t in vRes] == vTls*25
+  vIds = set()
+  for t in vRes:
+    vOwn = set()
+    for m in t.getMssg(): _mutables(m, vOwn)
+    assert not (vOwn & vIds) # no SML object, list or bytearray is shared between results
+    vIds |= vOwn
+  assert {k:v.getData() for k,v in pySML.SML_MessageBody._bodies.items()} == vBds
+
+def test_data_replaces_messages(sample):
+  vTlg = pySML.SML_Telegram()
+  vTlg.data = sample
+  vTlg.data = sample
+  assert len(vTlg.getMssg()) == 3
+  assert len(vTlg.getMssg()[1].MessageBody.Element.ValList.valu) == 11
+  vTlg.getMssg()[1].MessageBody.Element.ValList.data = vTlg.getMssg()[1].MessageBody.Element.ValList.getData()
+  assert len(vTlg.getMssg()[1].MessageBody.Element.ValList.valu) == 11
+
+def test_intern_table(sample):
+  vTab = pySML.SML_InternTable(MaxSize=4)
+  vDec = pySML.SML_Decoder(Intern=vTab)
+  vTl1 = vDec.decode(bytearray(sample))
+  assert vTab.size == 4 and vTab.misses > 0
+  vMss = vTab.misses
+  vTl2 = vDec.decode(bytearray(sample))
+  assert vTab.size == 4 and vTab.misses == 2*vMss
+  vBd1 = vTl1.getMssg()[1].MessageBody.Element
+  vBd2 = vTl2.getMssg()[1].MessageBody.Element
+  assert vBd1.ServerId.valu is vBd2.ServerId.valu is vTl2.getMssg()[0].MessageBody.Element.ServerId.valu
+  vOb1 = [e.ObjName.valu for e in vBd1.ValList.valu]
+  vOb2 = [e.ObjName.valu for e in vBd2.ValList.valu]
+  assert vOb1 == vOb2 and all(type(o) == bytes for o in vOb1 + vOb2)
+  vNew = [i for i in range(len(vOb1)) if ( vOb1[i] is not vOb2[i] )] # not interned as the table was full
+  assert len(vNew) == vMss
+  vTab = pySML.SML_InternTable()
+  vDec = pySML.SML_Decoder(Intern=vTab, Compiled=True)
+  vOb1 = [e.ObjName.valu for e in vDec.decode(bytearray(sample)).getMssg()[1].MessageBody.Element.ValList.valu]
+  vOb2 = [e.ObjName.valu for e in vDec.decode(bytearray(sample)).getMssg()[1].MessageBody.Element.ValList.valu]
+  assert all(a is b for a,b in zip(vOb1, vOb2)) and vTab.misses == 0
+
+def test_decode_errors(monkeypatch, sample, malformed):
+  with pytest.raises(pySML.SMLException) as e:
+    pySML.SML_Decoder().decode(malformed)
+  assert isinstance(e.value.__cause__, pySML.MALFORMED_ERRORS)
+  def bug(self, Data): raise AttributeError("bug")
+  monkeypatch.setattr(pySML.SML_Telegram, "data", property(pySML.SML_Telegram.getData, bug))
+  with pytest.raises(AttributeError):
+    pySML.SML_Decoder().decode(sample) # not caused by the data, so not hidden as a malformed telegram
+
+def test_crc_matches_table():
+  vRnd = random.Random(1)
+  vTlg = pySML.SML_Telegram()
+  for n in list(range(20)) + [vRnd.randint(20, 2000) for i in range(50)]:
+    vDat = bytearray(vRnd.randbytes(n))
+    assert vTlg.crc(vDat) == _crcTable(vDat)
+    assert vTlg.crc(vDat, Int=False) == vTlg.crc(vDat).to_bytes(2, "big")
+
+def test_verify(sample, corrupted):
+  vMsg = bytearray(sample)
+  vMsg[70] ^= 0x01                                           # in the 'ServerId' of the SML_GetListRes
+  vMsg[-2:] = pySML.SML_Telegram().crc(vMsg[:-2], Int=False) # only the CRC of the message fails
+  vSpn = [sample, corrupted, vMsg, sample[:200], sample[:15], sample]
+  vOff = [0]
+  for t in vSpn: vOff.append(vOff[-1] + len(t))
+  vRes = pySML.SML_Decoder().verify(b"".join(vSpn), vOff)
+  assert vRes == [True, False, False, False, False, True]
+
+@pytest.mark.parametrize("Compiled", [False, True])
+def test_message_types(sample, Compiled):
+  vTlg = pySML.SML_Decoder(MessageTypes={0x0701}, Compiled=Compiled).decode(sample)
+  assert [type(m.MessageBody.Element) for m in vTlg.getMssg()] == [pySML.SML_GetListRes]
+  vBeg = sample.index(bytes.fromhex("760700140482172a")) # the SML_GetListRes message
+  vEnd = sample.index(bytes.fromhex("760700140482172b"))
+  vAll = pySML.SML_Decoder().decode(vTlg.getData())      # only contains the decoded SML_Message
+  assert [m.getData() for m in vAll.getMssg()] == [sample[vBeg:vEnd]]
+
+@pytest.mark.parametrize("Compiled", [False, True])
+def test_check_skipped(sample, Compiled):
+  sample[sample.index(b"\x09EMH")+1] ^= 0x01            # the 'ServerId' of the SML_PublicOpenRes
+  sample[-2:] = pySML.SML_Telegram().crc(sample[:-2], Int=False)
+  vTlg = pySML.SML_Decoder(MessageTypes={0x0701}, Compiled=Compiled).decode(bytearray(sample))
+  assert len(vTlg.getMssg()) == 1
+  with pytest.raises(pySML.SMLExceptionChecksum):
+    pySML.SML_Decoder(MessageTypes={0x0701}, CheckSkipped=True, Compiled=Compiled).decode(sample)
+
+def test_edit_same_length(sample):
+  vTlg = pySML.SML_Decoder().decode(sample)
+  vMsg = vTlg.getMssg()[1]
+  vOld = bytes(sample)
+  vRes = vTlg.edit(vMsg.MessageBody.Element.ServerId, bytearray(b"HelloSML"))
+  assert vRes is sample
+  assert len(sample) == len(vOld)
+  vOff = vOld.index(b"\x09EMHXXXXX", 60) + 1     # the 'ServerId' of the SML_GetListRes
+  vCrc = vOld.index(b"\x63\xbc\xd7\x00\x76") + 1 # the 'Crc' of the SML_GetListRes message
+  vDif = [i for i in range(len(sample)) if ( sample[i] != vOld[i] )]
+  assert vDif == list(range(vOff, vOff+8)) + [vCrc, vCrc+1, len(sample)-2, len(sample)-1]
+  vNew = pySML.SML_Decoder().decode(bytearray(sample))
+  assert vNew.getData() == vTlg.getData() == sample
+  assert vNew.getMssg()[1].MessageBody.Element.ServerId.valu == b"HelloSML"
+
+def test_edit_other_length(sample):
+  vTlg = pySML.SML_Decoder().decode(sample)
+  vMsg = vTlg.getMssg()
+  vTlg.edit(vMsg[0].MessageBody.Element.ServerId, bytearray(b"LONGERID12"))
+  assert (len(sample), sample[-3]) == (418, 3)                       # padding rebuilt
+  vTlg.edit(vMsg[1].MessageBody.Element.ServerId, bytearray(b"ID"))  # behind the shifted offset
+  assert (len(sample), sample[-3]) == (410, 1)
+  vNew = pySML.SML_Decoder().decode(bytearray(sample))
+  assert vNew.getData() == vTlg.getData() == sample
+  assert vNew.getMssg()[0].MessageBody.Element.ServerId.valu == b"LONGERID12"
+  assert vNew.getMssg()[1].MessageBody.Element.ServerId.valu == b"ID"
+
+def test_edit_foreign_node(sample):
+  vTlg = pySML.SML_Decoder().decode(sample)
+  vOth = pySML.SML_Decoder().decode(bytearray(sample))
+  with pytest.raises(pySML.SMLException):
+    vTlg.edit(vOth.getMssg()[1].MessageBody.Element.ServerId, bytearray(b"HelloSML"))
+  with pytest.raises(pySML.SMLException):
+    vTlg.edit(pySML.SML_OctetString(), bytearray(b"HelloSML"))